@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Create, update and delete --effects effects through the per-row API
+(one request and one commit per effect) and through the bulk endpoints
+(EFFECT_BATCH_MAX_IDS effects per request, one transaction each).
+
+    python benchmarks/bench_bulk_effects.py --effects 1000
+
+Reports requests, commits, wall time and effects per second for each phase.
+Set BENCH_DATABASE_URL to measure against PostgreSQL.
+"""
+
+import argparse
+import time
+
+from common import load_app, auth_headers
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--effects', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = load_app()
+    from sqlalchemy import event
+    from src.models.user import db
+    from src.config import EFFECT_BATCH_MAX_IDS
+
+    commits = {'count': 0}
+    with app.app_context():
+        event.listen(db.engine, 'commit', lambda conn: commits.update(count=commits['count'] + 1))
+
+    client = app.test_client()
+    headers = auth_headers(client)
+    payload = [{'effect_name': f'catalog effect {i}', 'category': 'beauty', 'tags': 'glow,soft', 'hint': 'Smile'}
+               for i in range(args.effects)]
+
+    def per_row():
+        ids = []
+        for item in payload:
+            response = client.post('/api/effects', headers=headers, json=item)
+            ids.append(response.get_json()['effect']['id'])
+        yield 'create', len(ids)
+        for effect_id in ids:
+            client.put(f'/api/effects/{effect_id}', headers=headers, json={'hint': 'Blink', 'status': 'published'})
+        yield 'update', len(ids)
+        for effect_id in ids:
+            client.delete(f'/api/effects/{effect_id}', headers=headers)
+        yield 'delete', len(ids)
+
+    def bulk():
+        ids, requests = [], 0
+        for batch in chunks(payload, EFFECT_BATCH_MAX_IDS):
+            response = client.post('/api/effects/bulk', headers=headers, json={'effects': batch})
+            ids.extend(result['effect_id'] for result in response.get_json()['results'])
+            requests += 1
+        yield 'create', requests
+        requests = 0
+        for batch in chunks(ids, EFFECT_BATCH_MAX_IDS):
+            effects = [{'id': effect_id, 'hint': 'Blink', 'status': 'published'} for effect_id in batch]
+            assert client.put('/api/effects/bulk', headers=headers, json={'effects': effects}).status_code == 200
+            requests += 1
+        yield 'update', requests
+        requests = 0
+        for batch in chunks(ids, EFFECT_BATCH_MAX_IDS):
+            assert client.delete('/api/effects/bulk', headers=headers, json={'effect_ids': batch}).status_code == 200
+            requests += 1
+        yield 'delete', requests
+
+    print(f"{'api':<8} {'phase':<7} {'requests':>9} {'commits':>8} {'seconds':>8} {'effects/s':>10}")
+    for name, run in (('per-row', per_row), ('bulk', bulk)):
+        phases = run()
+        while True:
+            commits['count'] = 0
+            start = time.perf_counter()
+            try:
+                phase, requests = next(phases)
+            except StopIteration:
+                break
+            elapsed = time.perf_counter() - start
+            print(f"{name:<8} {phase:<7} {requests:>9} {commits['count']:>8} {elapsed:>8.2f} "
+                  f"{args.effects / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+CPU cost vs bytes saved for compressing real API payloads at each gzip level
+(and brotli quality, when the brotli package is installed).
+
+    python benchmarks/bench_compression.py --rows 500 --link-kbps 1000
+
+Payloads are fetched uncompressed from the app after seeding --rows effects
+and campaigns. For each setting the table shows the median compression time,
+the compressed size, and how much transfer time it saves on a --link-kbps
+link, so COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_QUALITY / COMPRESS_MIN_SIZE
+can be picked from numbers.
+"""
+
+import argparse
+import statistics
+import time
+
+from common import load_app, auth_headers
+
+
+def seed(app, rows):
+    from src.models.user import db, User, Effect, Campaign, CampaignLog
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        db.session.execute(Effect.__table__.insert(), [
+            {'user_id': user_id, 'effect_name': f'Glow effect {i}', 'category': 'beauty', 'tags': 'glow,beauty,filter',
+             'hint': 'Smile to start', 'status': 'published'}
+            for i in range(rows)
+        ])
+        db.session.execute(Campaign.__table__.insert(), [
+            {'user_id': user_id, 'campaign_name': f'Promo campaign {i}', 'campaign_type': 'web', 'target_count': 1000}
+            for i in range(rows)
+        ])
+        campaign_id = db.session.query(Campaign.id).filter_by(user_id=user_id).first()[0]
+        db.session.execute(CampaignLog.__table__.insert(), [
+            {'campaign_id': campaign_id, 'action_type': 'web', 'target_url': 'https://example.com/landing',
+             'device_type': 'Mobile', 'country': 'ID', 'success': i % 4 != 0}
+            for i in range(rows)
+        ])
+        db.session.commit()
+        return campaign_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--link-kbps', type=float, default=1000, help='client link speed for the transfer estimate')
+    args = parser.parse_args()
+
+    app = load_app()
+    from src.services.compression import compress, brotli
+
+    campaign_id = seed(app, args.rows)
+    client = app.test_client()
+    headers = {**auth_headers(client), 'Accept-Encoding': 'identity'}
+    payloads = {
+        'campaigns list': f'/api/campaigns?limit={args.rows}',
+        'effects list': f'/api/effects?limit={args.rows}',
+        'earnings report': '/api/effect-house/earnings',
+        'campaign stats': f'/api/campaigns/{campaign_id}/stats',
+        'metrics': '/metrics',
+    }
+
+    settings = [('gzip', level) for level in (1, 4, 6, 9)]
+    if brotli is not None:
+        settings += [('br', quality) for quality in (1, 4, 6, 11)]
+    else:
+        print('brotli is not installed; measuring gzip only')
+
+    print(f"{'payload':<16} {'bytes':>8} {'encoding':<9} {'ms':>7} {'out':>8} {'saved':>6} {'ms saved @link':>15}")
+    for name, path in payloads.items():
+        data = client.get(path, headers=headers).get_data()
+        for encoding, level in settings:
+            options = {'gzip_level': level} if encoding == 'gzip' else {'brotli_quality': level}
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                out = compress(data, encoding, **options)
+                timings.append(time.perf_counter() - start)
+            cpu_ms = statistics.median(timings) * 1000
+            # Transfer time saved minus the time spent compressing
+            net_ms = (len(data) - len(out)) * 8 / args.link_kbps - cpu_ms
+            print(f'{name:<16} {len(data):>8} {encoding + "-" + str(level):<9} {cpu_ms:>7.2f} {len(out):>8} '
+                  f'{(1 - len(out) / len(data)) * 100:>5.0f}% {net_ms:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
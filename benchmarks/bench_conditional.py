@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Database load of a polling frontend with and without conditional GETs.
+
+    python benchmarks/bench_conditional.py --rows 1000 --polls 300 --write-every 20
+
+A client polls /api/effects, /api/campaigns and /api/tiktok-accounts in turn
+and edits one effect every --write-every polls. The 'unconditional' client
+ignores ETags (the previous behaviour); the 'conditional' client sends
+If-None-Match with the last ETag of each list. Reports SQL statements and SQL
+time per poll, wall time per poll, the share of 304 answers and response bytes.
+"""
+
+import argparse
+import time
+
+from common import load_app, auth_headers
+
+LISTS = ('/api/effects', '/api/campaigns', '/api/tiktok-accounts')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='effects, campaigns and accounts per user')
+    parser.add_argument('--polls', type=int, default=300)
+    parser.add_argument('--write-every', type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app()
+    from sqlalchemy import event
+    from src.models.user import db, User, Effect, Campaign, TikTokAccount
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        db.session.execute(Effect.__table__.insert(), [
+            {'user_id': user_id, 'effect_name': f'effect {i}', 'category': 'beauty', 'status': 'published'}
+            for i in range(args.rows)
+        ])
+        db.session.execute(Campaign.__table__.insert(), [
+            {'user_id': user_id, 'campaign_name': f'campaign {i}', 'campaign_type': 'web'} for i in range(args.rows)
+        ])
+        db.session.execute(TikTokAccount.__table__.insert(), [
+            {'user_id': user_id, 'account_username': f'acct{i}'} for i in range(args.rows)
+        ])
+        db.session.commit()
+        effect_id = db.session.query(Effect.id).filter_by(user_id=user_id).first()[0]
+        engine = db.engine
+
+    sql = {'statements': 0, 'seconds': 0.0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._bench_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        sql['statements'] += 1
+        sql['seconds'] += time.perf_counter() - context._bench_start
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    print(f"{'client':<14} {'stmts/poll':>11} {'sql ms/poll':>12} {'ms/poll':>8} {'304s':>6} {'KB total':>9}")
+    for mode in ('unconditional', 'conditional'):
+        etags = {}
+        polls = not_modified = received = 0
+        sql.update(statements=0, seconds=0.0)
+        start = time.perf_counter()
+        for i in range(args.polls):
+            if i and i % args.write_every == 0:
+                # Writes are part of the workload but not of the poll cost
+                statements, seconds = sql['statements'], sql['seconds']
+                client.put(f'/api/effects/{effect_id}', headers=headers, json={'hint': f'edit {i}'})
+                sql.update(statements=statements, seconds=seconds)
+            path = LISTS[i % len(LISTS)]
+            request_headers = dict(headers)
+            if mode == 'conditional' and path in etags:
+                request_headers['If-None-Match'] = etags[path]
+            response = client.get(path, headers=request_headers)
+            etags[path] = response.headers.get('ETag')
+            not_modified += response.status_code == 304
+            received += len(response.get_data())
+            polls += 1
+        elapsed = time.perf_counter() - start
+
+        print(f"{mode:<14} {sql['statements'] / polls:>11.2f} {sql['seconds'] * 1000 / polls:>12.3f} "
+              f"{elapsed * 1000 / polls:>8.2f} {not_modified / polls:>5.0%} {received / 1024:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
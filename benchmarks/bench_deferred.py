@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Load TikTokAccount and Campaign rows through the ORM with their large text
+columns deferred (the default) and undeferred (the previous behaviour).
+
+    python benchmarks/bench_deferred.py --rows 5000 --cookie-bytes 4096
+
+Reports the median query time, tracemalloc peak and the bytes of Text column
+data each query fetches from the database.
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from common import load_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--cookie-bytes', type=int, default=4096, help='size of each account cookies_data value')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = load_app()
+
+    from sqlalchemy import func
+    from sqlalchemy.orm import undefer, undefer_group
+    from src.models.user import db, User, TikTokAccount, Campaign
+
+    cookies = json.dumps([{'name': 'sessionid', 'value': 'x' * args.cookie_bytes, 'domain': '.tiktok.com'}])
+    targeting = {
+        'target_urls': json.dumps([f'https://example.com/page/{i}' for i in range(50)]),
+        'target_countries': json.dumps(['US', 'ID', 'SG', 'MY', 'PH', 'TH', 'VN']),
+        'device_types': json.dumps(['Desktop', 'Mobile', 'Tablet']),
+        'traffic_sources': json.dumps(['organic', 'social', 'referral']),
+    }
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        db.session.execute(TikTokAccount.__table__.insert(), [
+            {'user_id': user_id, 'account_username': f'acct{i}', 'cookies_data': cookies} for i in range(args.rows)
+        ])
+        db.session.execute(Campaign.__table__.insert(), [
+            {'user_id': user_id, 'campaign_name': f'campaign {i}', 'campaign_type': 'web', **targeting}
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+        def text_bytes(columns):
+            return sum(db.session.query(func.coalesce(func.sum(func.length(column)), 0)).scalar() for column in columns)
+
+        all_columns = lambda model: [column for column in model.__table__.columns]
+        eager_columns = lambda model: [column for column in model.__table__.columns
+                                       if not model.__mapper__.get_property_by_column(column).deferred]
+
+        cases = [
+            ('TikTokAccount', 'undeferred', lambda: TikTokAccount.query.options(undefer(TikTokAccount.cookies_data)),
+             all_columns(TikTokAccount)),
+            ('TikTokAccount', 'deferred', lambda: TikTokAccount.query, eager_columns(TikTokAccount)),
+            ('Campaign', 'undeferred', lambda: Campaign.query.options(undefer_group('targeting')), all_columns(Campaign)),
+            ('Campaign', 'deferred', lambda: Campaign.query, eager_columns(Campaign)),
+        ]
+
+        print(f"{'model':<14} {'columns':<11} {'median ms':>10} {'peak MB':>9} {'text MB':>11}")
+        for model, label, query, columns in cases:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                query().filter_by(user_id=user_id).all()
+                timings.append(time.perf_counter() - start)
+                db.session.expunge_all()
+
+            tracemalloc.start()
+            query().filter_by(user_id=user_id).all()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            db.session.expunge_all()
+
+            # Text columns dominate the transfer; count their bytes via length()
+            fetched = text_bytes([column for column in columns if isinstance(column.type, db.Text)])
+            print(f'{model:<14} {label:<11} {statistics.median(timings) * 1000:>10.1f} {peak / 1e6:>9.1f} '
+                  f'{fetched / 1e6:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Earnings report latency over daily analytics snapshots.
+
+    python benchmarks/bench_earnings.py --effects 1000 --days 90
+
+Seeds --effects published effects with --days of AnalyticsSnapshot rows each,
+then times GET /api/effect-house/earnings for every date_range window.
+Reports the median latency and the SQL statements per report, which stay
+constant as effects and days grow.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from common import load_app, auth_headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--effects', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = load_app()
+    from src.models.user import db, User, Effect, AnalyticsSnapshot
+    from src.services.analytics_snapshot_service import REPORT_WINDOWS, analytics_snapshot_service
+    from src.services.query_budget import record_queries
+
+    today = datetime.utcnow().date()
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        created_at = datetime.utcnow() - timedelta(days=args.days)
+        db.session.execute(Effect.__table__.insert(), [
+            {'user_id': user_id, 'effect_name': f'effect {i}', 'status': 'published', 'created_at': created_at}
+            for i in range(args.effects)
+        ])
+        effect_ids = db.session.query(Effect.id).filter_by(user_id=user_id).all()
+        rows = []
+        for (effect_id,) in effect_ids:
+            for offset in range(1, args.days + 1):
+                views = random.randint(10, 2000)
+                rows.append({'effect_id': effect_id, 'day': today - timedelta(days=offset), 'views': views,
+                             'uses': views // 3, 'earnings': views * 0.002})
+        db.session.execute(AnalyticsSnapshot.__table__.insert(), rows)
+        db.session.commit()
+
+    client = app.test_client()
+    headers = auth_headers(client)
+    # The first report schedules a background ingest, which finds nothing new
+    # but marks the user as up to date
+    client.get('/api/effect-house/earnings', headers=headers)
+    deadline = time.monotonic() + 30
+    while not analytics_snapshot_service.is_current(user_id) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    print(f"{'effects':>8} {'snapshots':>10} {'range':<6} {'median ms':>10} {'statements':>11}")
+    for date_range in REPORT_WINDOWS:
+        path = f'/api/effect-house/earnings?date_range={date_range}'
+        timings = []
+        for _ in range(args.repeat):
+            with record_queries() as recorder:
+                start = time.perf_counter()
+                assert client.get(path, headers=headers).status_code == 200
+                timings.append(time.perf_counter() - start)
+        print(f'{args.effects:>8} {len(rows):>10} {date_range:<6} {statistics.median(timings) * 1000:>10.1f} '
+              f'{recorder.count:>11}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Run gunicorn with each serving profile from gunicorn.conf.py, drive a mixed
+load through it and report requests/s plus memory per worker.
+
+    python benchmarks/bench_gunicorn.py --profiles sync gthread small --duration 10
+
+Memory comes from /proc/<pid>/smaps_rollup: RSS, PSS (shared pages split
+between processes) and the shared part of RSS. Linux only.
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+
+from common import gunicorn_server, http_request, init_database_url, temp_database_url
+
+PATHS = ['/ping', '/api/effects', '/api/campaigns', '/api/auth/profile']
+
+
+def memory_kb(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(':'):
+                values[parts[0][:-1]] = int(parts[1])
+    shared = values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0)
+    return values.get('Rss', 0), values.get('Pss', 0), shared
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def drive(port, token, duration, clients):
+    counts = [0] * clients
+    errors = [0] * clients
+    stop_at = time.time() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        headers = {'Authorization': f'Bearer {token}'}
+        i = index
+        while time.time() < stop_at:
+            status, _ = http_request(conn, 'GET', PATHS[i % len(PATHS)], headers)
+            i += 1
+            counts[index] += 1
+            if status != 200:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration, sum(errors)
+
+
+def run_profile(profile, args, database_url):
+    env = {'GUNICORN_PROFILE': profile}
+    if profile == 'sync-nopreload':
+        env.update(GUNICORN_PROFILE='sync', GUNICORN_PRELOAD='False')
+    if args.workers:
+        env['WEB_CONCURRENCY'] = str(args.workers)
+
+    with gunicorn_server(database_url, **env) as (port, server):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        _, body = http_request(conn, 'POST', '/api/auth/login', {'Content-Type': 'application/json'},
+                               json.dumps({'username': 'admin', 'password': 'admin123'}))
+        token = json.loads(body)['token']
+
+        rps, errors = drive(port, token, args.duration, args.clients)
+        workers = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        master = memory_kb(server.pid)
+
+    count = len(workers)
+    return {
+        'profile': profile,
+        'workers': count,
+        'rps': round(rps, 1),
+        'errors': errors,
+        'master_rss_mb': round(master[0] / 1024, 1),
+        'worker_rss_mb': round(sum(w[0] for w in workers) / count / 1024, 1),
+        'worker_pss_mb': round(sum(w[1] for w in workers) / count / 1024, 1),
+        'worker_shared_mb': round(sum(w[2] for w in workers) / count / 1024, 1),
+        'total_pss_mb': round((master[1] + sum(w[1] for w in workers)) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=['sync-nopreload', 'sync', 'gthread', 'small'])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, help='force WEB_CONCURRENCY for every profile')
+    args = parser.parse_args()
+
+    database_url = temp_database_url('gunicorn-bench-')
+    init_database_url(database_url)
+
+    columns = ['profile', 'workers', 'rps', 'errors', 'master_rss_mb', 'worker_rss_mb', 'worker_pss_mb',
+               'worker_shared_mb', 'total_pss_mb']
+    print(''.join(f'{name:>17}' for name in columns))
+    for profile in args.profiles:
+        result = run_profile(profile, args, database_url)
+        print(''.join(f'{result[name]:>17}' for name in columns))
+
+
+if __name__ == '__main__':
+    main()
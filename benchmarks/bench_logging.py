@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+/ping throughput and latency through gunicorn with different logging setups.
+
+    python benchmarks/bench_logging.py --duration 10 --clients 16
+    python benchmarks/bench_logging.py --drain-delay 5   # slow log collector
+
+Modes:
+  off      LOG_LEVEL=WARNING, nothing is logged for /ping
+  sampled  default LOG_SAMPLE_RATES (1% of /ping records)
+  async    every /ping logged through the queue and background writer
+  sync     every /ping logged straight to stdout from the request thread
+
+Worker stdout is a pipe read by this script, as a container log driver would.
+--drain-delay sleeps that many milliseconds per 4 KB read to model a slow
+collector; that is when a synchronous write starts blocking requests.
+"""
+
+import argparse
+import http.client
+import subprocess
+import threading
+import time
+
+from common import gunicorn_server, http_request, init_database_url, temp_database_url
+
+MODES = {
+    'off': {'LOG_LEVEL': 'WARNING'},
+    'sampled': {},
+    'async': {'LOG_SAMPLE_RATES': ''},
+    'sync': {'LOG_SAMPLE_RATES': '', 'LOG_ASYNC': 'False'},
+}
+
+
+def drain(pipe, delay, counter):
+    while True:
+        chunk = pipe.read1(4096)
+        if not chunk:
+            return
+        counter[0] += chunk.count(b'\n')
+        if delay:
+            time.sleep(delay / 1000)
+
+
+def drive(port, duration, clients):
+    latencies = [[] for _ in range(clients)]
+    stop_at = time.time() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            http_request(conn, 'GET', '/ping')
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latency for per_client in latencies for latency in per_client)
+
+
+def run_mode(mode, args, database_url):
+    env = dict(MODES[mode], WEB_CONCURRENCY=str(args.workers))
+    lines = [0]
+    with gunicorn_server(database_url, stdout=subprocess.PIPE, **env) as (port, server):
+        reader = threading.Thread(target=drain, args=(server.stdout, args.drain_delay, lines), daemon=True)
+        reader.start()
+        latencies = drive(port, args.duration, args.clients)
+    reader.join(timeout=10)
+    rps = len(latencies) / args.duration
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    return rps, p50, p99, lines[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--drain-delay', type=float, default=0, help='ms the log reader sleeps per 4 KB read')
+    args = parser.parse_args()
+
+    database_url = temp_database_url('earning-sakti-logging-')
+    init_database_url(database_url)
+
+    print(f"{'mode':<9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'log lines':>10}")
+    for mode in args.modes:
+        rps, p50, p99, lines = run_mode(mode, args, database_url)
+        print(f'{mode:<9} {rps:>9.0f} {p50:>8.2f} {p99:>8.2f} {lines:>10}')
+
+
+if __name__ == '__main__':
+    main()
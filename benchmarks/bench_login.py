@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/auth/login throughput for several password hashing costs.
+
+    python benchmarks/bench_login.py --logins 40 --concurrency 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import load_app
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+
+def run(app, method, logins, concurrency):
+    from src.models.user import db, User, password_policy, PasswordHashPolicy
+
+    password_policy.method = PasswordHashPolicy.normalize(method)
+    with app.app_context():
+        user = User.query.filter_by(username='admin').first()
+        user.set_password('admin123')
+        db.session.commit()
+
+    def login(_):
+        with app.test_client() as client:
+            response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+            return response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'method': password_policy.method,
+        'logins': logins,
+        'ok': statuses.count(200),
+        'busy': statuses.count(503),
+        'logins_per_second': round(logins / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--method', action='append', dest='methods', help='werkzeug hash method, repeatable')
+    args = parser.parse_args()
+
+    app = load_app()
+    print(f"{'method':<26}{'logins/s':>10}{'ok':>6}{'busy':>6}")
+    for method in args.methods or DEFAULT_METHODS:
+        result = run(app, method, args.logins, args.concurrency)
+        print(f"{result['method']:<26}{result['logins_per_second']:>10}{result['ok']:>6}{result['busy']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyset pagination on /api/effects as the table grows.
+
+Grows the effect table through each size and times the first page and a page
+from the middle of the table. Latency should stay flat across sizes.
+
+    python benchmarks/bench_pagination.py --sizes 1000 10000 100000 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+from common import load_app, auth_headers
+
+BATCH = 10000
+
+
+def seed_effects(app, user_id, start, stop):
+    from src.models.user import db, Effect
+
+    with app.app_context():
+        for offset in range(start, stop, BATCH):
+            rows = [
+                {'user_id': user_id, 'effect_name': f'effect-{i}', 'category': 'bench', 'status': 'draft'}
+                for i in range(offset, min(offset + BATCH, stop))
+            ]
+            db.session.execute(Effect.__table__.insert(), rows)
+            db.session.commit()
+
+
+def time_requests(client, url, headers, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    app = load_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    print(f"{'rows':>10}{'first page ms':>16}{'middle page ms':>16}")
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed_effects(app, 1, seeded, size)
+        seeded = size
+        first = time_requests(client, f'/api/effects?limit={args.limit}', headers, args.repeat)
+        middle = time_requests(client, f'/api/effects?limit={args.limit}&after={size // 2}', headers, args.repeat)
+        print(f'{size:>10}{first:>16.2f}{middle:>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
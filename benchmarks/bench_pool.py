@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Stress the connection pool and report how long requests wait for a connection.
+
+Runs concurrent requests against /api/campaigns/<id>/stats with a deliberately
+small pool, then prints the pool section of /health.
+
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0 python benchmarks/bench_pool.py --threads 16
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DB_POOL_SIZE', '2')
+os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+
+from common import load_app, auth_headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    app = load_app()
+    from src.models.user import db
+    from src.models.pool import pool_status
+
+    client = app.test_client()
+    headers = auth_headers(client)
+    campaign = client.post('/api/campaigns', headers=headers, json={'campaign_name': 'bench', 'campaign_type': 'web'})
+    url = f"/api/campaigns/{campaign.get_json()['campaign']['id']}/stats"
+
+    def call(_):
+        with app.test_client() as thread_client:
+            return thread_client.get(url, headers=headers).status_code
+
+    print(f"pool_size={os.environ['DB_POOL_SIZE']} max_overflow={os.environ['DB_MAX_OVERFLOW']}")
+    for threads in args.threads:
+        with app.app_context():
+            db.engine.dispose()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(call, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        with app.app_context():
+            wait = pool_status(db.engine)['wait']
+        print(f'threads={threads:<3} rps={args.requests / elapsed:8.1f} errors={len(statuses) - statuses.count(200)} wait={json.dumps(wait)}')
+
+
+if __name__ == '__main__':
+    main()
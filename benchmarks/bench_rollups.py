@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compare a months-long CampaignLog report computed from raw rows against the
+same report read from the hourly/daily rollups.
+
+    python benchmarks/bench_rollups.py --logs 500000 --days 180
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import load_app
+
+BATCH = 10000
+
+
+def seed_logs(app, campaign_id, logs, days):
+    from src.models.user import db, CampaignLog
+
+    start = datetime.utcnow() - timedelta(days=days)
+    step = days * 86400 / logs
+    rng = random.Random(7)
+    with app.app_context():
+        for offset in range(0, logs, BATCH):
+            db.session.execute(CampaignLog.__table__.insert(), [
+                {
+                    'campaign_id': campaign_id,
+                    'action_type': 'web',
+                    'target_url': 'https://example.com',
+                    'device_type': rng.choice(['Desktop', 'Mobile', 'Tablet']),
+                    'country': rng.choice(['US', 'ID', 'SG', 'MY']),
+                    'success': rng.random() < 0.75,
+                    'timestamp': start + timedelta(seconds=i * step)
+                }
+                for i in range(offset, min(offset + BATCH, logs))
+            ])
+            db.session.commit()
+    return start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logs', type=int, default=500000)
+    parser.add_argument('--days', type=int, default=180)
+    args = parser.parse_args()
+
+    app = load_app()
+    from sqlalchemy import func, select
+    from src.models.user import db, Campaign, CampaignLog
+    from src.models.dialect import time_bucket
+    from src.services.campaign_rollup_service import campaign_rollup_service
+
+    with app.app_context():
+        campaign = Campaign(user_id=1, campaign_name='bench', campaign_type='web')
+        db.session.add(campaign)
+        db.session.commit()
+        campaign_id = campaign.id
+
+    start = seed_logs(app, campaign_id, args.logs, args.days)
+    end = datetime.utcnow() + timedelta(days=1)
+
+    with app.app_context():
+        began = time.perf_counter()
+        processed = campaign_rollup_service.refresh()
+        print(f'initial rollup of {processed} logs: {time.perf_counter() - began:.2f}s')
+
+        bucket = time_bucket('day', CampaignLog.timestamp)
+        began = time.perf_counter()
+        raw = db.session.execute(
+            select(bucket, CampaignLog.country, func.count())
+            .where(CampaignLog.campaign_id == campaign_id, CampaignLog.timestamp >= start, CampaignLog.timestamp < end)
+            .group_by(bucket, CampaignLog.country)
+        ).all()
+        raw_ms = (time.perf_counter() - began) * 1000
+
+        began = time.perf_counter()
+        rolled = campaign_rollup_service.query(campaign_id, start, end, 'day', ['country'])
+        rollup_ms = (time.perf_counter() - began) * 1000
+
+    print(f'daily report by country over {args.days} days ({len(raw)} vs {len(rolled)} buckets)')
+    print(f'  raw CampaignLog scan: {raw_ms:9.2f} ms')
+    print(f'  rollup query:         {rollup_ms:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
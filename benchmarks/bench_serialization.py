@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Serialize a large /api/effects page through each combination of
+ORM objects + to_dict() vs column projection, and Flask's stdlib JSON
+provider vs the orjson provider.
+
+    python benchmarks/bench_serialization.py --rows 10000 --repeat 10
+
+Latency is the median over --repeat runs of query + serialization + JSON
+response. Peak memory comes from a separate tracemalloc run of each path.
+"""
+
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+
+from common import load_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    # Let a single page hold every row
+    os.environ['MAX_PAGE_SIZE'] = str(args.rows)
+    app = load_app()
+
+    from flask.json.provider import DefaultJSONProvider
+    from src.json_provider import ORJSONProvider, orjson
+    from src.models.user import db, User, Effect
+    from src.models.projections import EFFECT_LIST
+    from src.routes.pagination import paginate
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        db.session.execute(Effect.__table__.insert(), [
+            {'user_id': user_id, 'effect_name': f'effect {i}', 'category': 'beauty', 'tags': 'a,b,c',
+             'hint': 'smile', 'status': 'published'}
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+    def orm_page():
+        return paginate(Effect.query.filter_by(user_id=user_id), Effect.id)
+
+    def projected_page():
+        return paginate(EFFECT_LIST.query(Effect.user_id == user_id), Effect.id, EFFECT_LIST.to_dict)
+
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = ORJSONProvider(app)
+    else:
+        print('orjson is not installed; only the stdlib provider is measured')
+
+    def run(page, provider):
+        with app.test_request_context(f'/api/effects?limit={args.rows}'):
+            effects, next_cursor = page()
+            body = provider.response({'effects': effects, 'next_cursor': next_cursor}).get_data()
+            db.session.remove()
+        return len(body)
+
+    print(f"{'rows':<8} {'query':<10} {'json':<8} {'median ms':>10} {'peak MB':>9} {'bytes':>10}")
+    for page_name, page in (('orm', orm_page), ('projected', projected_page)):
+        for provider_name, provider in providers.items():
+            run(page, provider)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                size = run(page, provider)
+                timings.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            run(page, provider)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f'{args.rows:<8} {page_name:<10} {provider_name:<8} {statistics.median(timings) * 1000:>10.1f} '
+                  f'{peak / 1e6:>9.1f} {size:>10}')
+
+
+if __name__ == '__main__':
+    main()
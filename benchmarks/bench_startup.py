@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Measure cold import time of the WSGI app module in fresh interpreters.
+
+Pass --repo several times to compare checkouts, e.g. a worktree of an older
+commit against the current tree:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_startup.py --repo /tmp/before --repo .
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def cold_import(repo, module, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], cwd=repo, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repo', action='append', dest='repos', help='checkout to measure (repeatable)')
+    parser.add_argument('--module', default='src.main')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'repo':<40}{'median ms':>12}{'min ms':>10}")
+    # Floor: the third-party libraries every version of the app needs
+    floor = [cold_import(ROOT, 'flask, flask_sqlalchemy, flask_cors, jwt', 'sqlite://') for _ in range(args.runs)]
+    print(f"{'(flask + sqlalchemy only)':<40}{statistics.median(floor):>12.1f}{min(floor):>10.1f}")
+    for repo in args.repos or [ROOT]:
+        repo = os.path.abspath(repo)
+        # Each checkout gets its own database, reused across runs as a deployed worker would
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='startup-bench-'), 'app.db')}"
+        cold_import(repo, args.module, database_url)  # warm the OS file cache and seed the database
+        samples = [cold_import(repo, args.module, database_url) for _ in range(args.runs)]
+        print(f'{repo:<40}{statistics.median(samples):>12.1f}{min(samples):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Status polling cost: one GET /api/effects/<id>/status per effect against one
+POST /api/effects/status for all of them.
+
+    python benchmarks/bench_status_polling.py --effects 200 --rounds 10 --change-rate 0.05
+
+check_effect_status is replaced by a stub where each poll changes an
+effect's status with probability --change-rate, like a review queue that
+moves slowly. 'per-effect (old)' replays the previous handler, which
+assigned the status and committed on every GET; it is called without the
+HTTP stack, so its time is a lower bound. For each client the table shows
+HTTP requests, UPDATE statements (executemany counts once), COMMITs and wall
+time per round.
+"""
+
+import argparse
+import os
+import random
+import time
+
+from common import load_app, auth_headers
+
+STATUSES = ['pending', 'approved', 'rejected', 'needs_revision']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--effects', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--change-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ['EFFECT_BATCH_MAX_IDS'] = str(max(args.effects, 500))
+    app = load_app()
+
+    from sqlalchemy import event
+    from src.models.user import db, User, Effect
+    from src.services.effect_house_service import effect_house_service
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        db.session.execute(Effect.__table__.insert(), [
+            {'user_id': user_id, 'effect_name': f'effect {i}', 'status': 'pending'} for i in range(args.effects)
+        ])
+        db.session.commit()
+        effect_ids = [effect_id for (effect_id,) in db.session.query(Effect.id).filter_by(user_id=user_id)]
+        engine = db.engine
+
+    remote = {effect_id: 'pending' for effect_id in effect_ids}
+
+    def check_effect_status(effect_id):
+        if random.random() < args.change_rate:
+            remote[effect_id] = random.choice([s for s in STATUSES if s != remote[effect_id]])
+        return remote[effect_id], 'stub'
+
+    effect_house_service.check_effect_status = check_effect_status
+
+    counts = {'updates': 0, 'commits': 0}
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('UPDATE'):
+            counts['updates'] += 1
+
+    def commit(conn):
+        counts['commits'] += 1
+
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'commit', commit)
+
+    def old_handler(effect_id):
+        with app.test_request_context():
+            effect = Effect.query.filter_by(id=effect_id, user_id=user_id).first()
+            status, _ = effect_house_service.check_effect_status(effect_id)
+            effect.status = status
+            db.session.commit()
+            db.session.remove()
+
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    def per_effect_old():
+        for effect_id in effect_ids:
+            old_handler(effect_id)
+        return len(effect_ids)
+
+    def per_effect():
+        for effect_id in effect_ids:
+            assert client.get(f'/api/effects/{effect_id}/status', headers=headers).status_code == 200
+        return len(effect_ids)
+
+    def batch():
+        response = client.post('/api/effects/status', headers=headers, json={'effect_ids': effect_ids})
+        assert response.status_code == 200, response.get_json()
+        return 1
+
+    print(f"{'client':<18} {'requests':>9} {'UPDATEs':>8} {'COMMITs':>8} {'ms/round':>9}")
+    for name, poll in (('per-effect (old)', per_effect_old), ('per-effect', per_effect), ('batch', batch)):
+        counts.update(updates=0, commits=0)
+        requests = 0
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            requests += poll()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<18} {requests:>9} {counts['updates']:>8} {counts['commits']:>8} "
+              f"{elapsed * 1000 / args.rounds:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
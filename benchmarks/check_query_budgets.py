@@ -0,0 +1,156 @@
+"""
+Check SQL statement budgets and N+1 patterns for the hot endpoints.
+
+Each endpoint is called for a user with a few rows and for a user with many
+rows, with QUERY_BUDGET_MODE=raise. It fails when an endpoint goes over its
+@query_budget, repeats one statement shape QUERY_REPEAT_THRESHOLD or more
+times, or runs more statements as the user's data grows.
+
+    python benchmarks/check_query_budgets.py
+    python benchmarks/check_query_budgets.py --small 3 --large 50
+
+Exits with status 1 when any check fails.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest import mock
+
+from common import load_app, auth_headers
+
+
+def seed(app, username, size):
+    from src.models.user import db, User, Effect, Campaign, CampaignLog, TikTokAccount
+
+    with app.app_context():
+        admin_hash = User.query.filter_by(username='admin').first().password_hash
+        user = User(username=username, email=f'{username}@example.com', password_hash=admin_hash)
+        db.session.add(user)
+        db.session.flush()
+        db.session.execute(Effect.__table__.insert(), [
+            {'user_id': user.id, 'effect_name': f'effect {i}', 'category': 'beauty', 'status': 'published'}
+            for i in range(size)
+        ])
+        db.session.execute(Campaign.__table__.insert(), [
+            {'user_id': user.id, 'campaign_name': f'campaign {i}', 'campaign_type': 'web', 'target_count': 10}
+            for i in range(size)
+        ])
+        db.session.execute(TikTokAccount.__table__.insert(), [
+            {'user_id': user.id, 'account_username': f'{username}_{i}', 'cookies_data': '[]'}
+            for i in range(size)
+        ])
+        campaign_id = db.session.query(Campaign.id).filter_by(user_id=user.id).first()[0]
+        start = datetime.utcnow() - timedelta(days=1)
+        db.session.execute(CampaignLog.__table__.insert(), [
+            {'campaign_id': campaign_id, 'action_type': 'web', 'success': i % 2 == 0,
+             'country': 'ID', 'device_type': 'Mobile', 'timestamp': start + timedelta(minutes=i)}
+            for i in range(size * 10)
+        ])
+        db.session.commit()
+        return {
+            'user_id': user.id,
+            'effects': [row[0] for row in db.session.query(Effect.id).filter_by(user_id=user.id)],
+            'accounts': [row[0] for row in db.session.query(TikTokAccount.id).filter_by(user_id=user.id)],
+            'campaign': campaign_id,
+        }
+
+
+def endpoint_cases(fixture):
+    """(label, method, path, json body) for every budgeted endpoint"""
+    effect = fixture['effects'][0]
+    return [
+        ('effects list', 'GET', '/api/effects', None),
+        ('campaigns list', 'GET', '/api/campaigns', None),
+        ('tiktok accounts list', 'GET', '/api/tiktok-accounts', None),
+        ('users list', 'GET', '/api/users', None),
+        ('campaign stats', 'GET', f"/api/campaigns/{fixture['campaign']}/stats", None),
+        ('campaign report', 'GET', f"/api/campaigns/{fixture['campaign']}/report", None),
+        ('earnings report', 'GET', '/api/effect-house/earnings', None),
+        ('publish effect', 'POST', f'/api/effects/{effect}/publish', {'account_ids': fixture['accounts']}),
+        ('bulk publish', 'POST', '/api/effect-house/bulk-operations',
+         {'operation': 'bulk_publish', 'effect_ids': fixture['effects'], 'account_ids': fixture['accounts']}),
+        ('bulk resubmit', 'POST', '/api/effect-house/bulk-operations',
+         {'operation': 'bulk_resubmit', 'effect_ids': fixture['effects']}),
+        ('batch status', 'POST', '/api/effects/status', {'effect_ids': fixture['effects']}),
+        ('bulk create', 'POST', '/api/effects/bulk',
+         {'effects': [{'effect_name': f'bulk {i}'} for i in range(len(fixture['effects']))]}),
+        ('bulk update', 'PUT', '/api/effects/bulk',
+         {'effects': [{'id': effect_id, 'hint': 'updated'} for effect_id in fixture['effects']]}),
+    ]
+
+
+def run_endpoint(client, headers, method, path, body):
+    """Returns (statements, problem or None)"""
+    from src.services.query_budget import QueryBudgetExceeded, record_queries
+
+    with record_queries() as recorder:
+        try:
+            response = client.open(path, method=method, json=body, headers=headers)
+            problem = None if response.status_code < 400 else f'HTTP {response.status_code}'
+        except QueryBudgetExceeded as e:
+            problem = str(e)
+    return recorder.count, problem
+
+
+def run_service(app, fixture):
+    """Statements for EffectHouseService.bulk_publish_effect, which runs outside a request"""
+    from src.services.effect_house_service import effect_house_service
+    from src.services.query_budget import record_queries
+
+    with app.app_context(), record_queries() as recorder:
+        effect_house_service.bulk_publish_effect(fixture['effects'][0], fixture['accounts'])
+    problems = recorder.violations()
+    return recorder.count, '; '.join(problems) or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--small', type=int, default=3, help='rows per table for the small user')
+    parser.add_argument('--large', type=int, default=30, help='rows per table for the large user')
+    args = parser.parse_args()
+
+    os.environ['QUERY_BUDGET_MODE'] = 'raise'
+    app = load_app()
+    app.config.update(TESTING=True, QUERY_BUDGET_MODE='raise')
+    client = app.test_client()
+
+    # Keep the simulated Effect House calls from sleeping or touching the network
+    patches = [
+        mock.patch('src.services.effect_house_service.time.sleep'),
+        mock.patch('src.services.effect_house_service.EffectHouseService.upload_effect',
+                   return_value=(True, 'ok')),
+        mock.patch('src.services.effect_house_service.EffectHouseService.check_effect_status',
+                   return_value=('rejected', 'rejected')),
+        mock.patch('src.routes.effects.publish_effect_background'),
+    ]
+    for patch in patches:
+        patch.start()
+
+    results = {}
+    for size_name, size in (('small', args.small), ('large', args.large)):
+        fixture = seed(app, f'budget_{size_name}', size)
+        headers = auth_headers(client, f'budget_{size_name}')
+        # Warm the identity cache so every endpoint is measured the same way
+        client.get('/api/auth/profile', headers=headers)
+        for label, method, path, body in endpoint_cases(fixture):
+            results.setdefault(label, {})[size_name] = run_endpoint(client, headers, method, path, body)
+        results.setdefault('bulk_publish_effect (service)', {})[size_name] = run_service(app, fixture)
+
+    failures = 0
+    print(f"{'endpoint':<32} {'small':>6} {'large':>6}  result")
+    for label, runs in results.items():
+        (small_count, small_problem), (large_count, large_problem) = runs['small'], runs['large']
+        problems = [problem for problem in (small_problem, large_problem) if problem]
+        if large_count > small_count:
+            problems.append(f'statement count grows with data ({small_count} -> {large_count})')
+        failures += bool(problems)
+        print(f"{label:<32} {small_count:>6} {large_count:>6}  {'; '.join(problems) or 'ok'}")
+
+    for patch in patches:
+        patch.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared helpers for the benchmark scripts in this directory
+"""
+
+import contextlib
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def load_app(database_url=None):
+    """Create the Flask app against a throwaway SQLite database unless one is given, migrated and seeded"""
+    if database_url is None:
+        database_url = os.environ.get('BENCH_DATABASE_URL')
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='earning-sakti-bench-'), 'bench.db')
+        database_url = f'sqlite:///{path}'
+    os.environ['DATABASE_URL'] = database_url
+
+    from src.main import app
+    from src.init_db import init_database
+    init_database(app)
+    return app
+
+
+def auth_headers(client, username='admin', password='admin123'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def http_request(conn, method, path, headers=None, body=None):
+    """Send one request on a keep-alive connection; returns (status, body bytes)"""
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            if http_request(conn, 'GET', '/ping')[0] == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+@contextlib.contextmanager
+def gunicorn_server(database_url, stdout=subprocess.DEVNULL, **env):
+    """Run gunicorn with gunicorn.conf.py on a free port; yields (port, master process)"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), DATABASE_URL=database_url, **env)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=stdout, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(port)
+        yield port, server
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def init_database_url(database_url):
+    """Apply migrations and the default admin user to a database in a subprocess"""
+    subprocess.run([sys.executable, '-m', 'src.init_db'], cwd=ROOT, env=dict(os.environ, DATABASE_URL=database_url),
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def temp_database_url(prefix='bench-'):
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix=prefix), 'bench.db')}"
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Load-test every blueprint through a local gunicorn server.
+
+Seeds a throwaway SQLite database (or BENCH_DATABASE_URL, e.g. a local
+Postgres), starts gunicorn with gunicorn.conf.py, drives a weighted traffic
+mix from keep-alive clients and reports p50/p95/p99 latency and requests/s per
+endpoint. Results are saved as JSON so runs can be compared:
+
+    python benchmarks/loadtest.py --mix dashboard --duration 20 --output before.json
+    python benchmarks/loadtest.py --mix dashboard --duration 20 --output after.json --compare before.json
+
+With --compare the script exits 1 when an endpoint's p95 or the overall
+throughput regresses by more than --threshold percent.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from common import gunicorn_server, http_request, init_database_url, temp_database_url, load_app
+
+# (weight, endpoint label) per mix; labels map to request builders below
+MIXES = {
+    'dashboard': [
+        (20, 'GET /api/effects'),
+        (15, 'GET /api/campaigns'),
+        (10, 'GET /api/tiktok-accounts'),
+        (10, 'GET /api/campaigns/<id>/stats'),
+        (5, 'GET /api/campaigns/<id>/report'),
+        (10, 'GET /api/auth/profile'),
+        (5, 'GET /api/effects/<id>/status'),
+        (5, 'GET /api/effects/<id>/analytics'),
+        (5, 'GET /api/users'),
+        (5, 'GET /api/users/<id>'),
+        (10, 'GET /ping'),
+    ],
+    'write': [
+        (15, 'POST /api/effects'),
+        (15, 'PUT /api/effects/<id>'),
+        (10, 'POST /api/campaigns'),
+        (10, 'PUT /api/campaigns/<id>'),
+        (10, 'POST /api/tiktok-accounts'),
+        (10, 'PUT /api/tiktok-accounts/<id>'),
+        (15, 'GET /api/effects'),
+        (15, 'GET /api/campaigns'),
+    ],
+    'auth': [
+        (20, 'POST /api/auth/login'),
+        (80, 'GET /api/auth/profile'),
+    ],
+}
+MIXES['mixed'] = MIXES['dashboard'] + MIXES['write'] + [(5, 'POST /api/auth/login')]
+
+
+def seed(database_url, users, per_user, logs_per_campaign):
+    """Create users with effects, campaigns (with logs) and TikTok accounts; returns ids per user"""
+    app = load_app(database_url)
+    from src.models.user import db, User, Effect, Campaign, TikTokAccount, CampaignLog
+
+    rng = random.Random(42)
+    fixtures = []
+    with app.app_context():
+        admin_hash = User.query.filter_by(username='admin').first().password_hash
+        for n in range(users):
+            user = User(username=f'load{n}', email=f'load{n}@example.com', password_hash=admin_hash)
+            db.session.add(user)
+            db.session.flush()
+            db.session.execute(Effect.__table__.insert(), [
+                {'user_id': user.id, 'effect_name': f'effect {i}', 'category': 'beauty', 'tags': 'a,b',
+                 'hint': 'smile', 'status': rng.choice(['draft', 'published', 'pending'])}
+                for i in range(per_user)
+            ])
+            db.session.execute(Campaign.__table__.insert(), [
+                {'user_id': user.id, 'campaign_name': f'campaign {i}', 'campaign_type': 'web',
+                 'target_urls': '["https://example.com"]', 'target_countries': '["US", "ID"]',
+                 'device_types': '["Desktop", "Mobile"]', 'traffic_sources': '[]', 'target_count': 100}
+                for i in range(per_user)
+            ])
+            db.session.execute(TikTokAccount.__table__.insert(), [
+                {'user_id': user.id, 'account_username': f'acct{n}_{i}', 'cookies_data': '[{"name": "sid", "value": "x"}]'}
+                for i in range(per_user)
+            ])
+            campaign_ids = [row[0] for row in db.session.query(Campaign.id).filter_by(user_id=user.id)]
+            start = datetime.utcnow() - timedelta(days=30)
+            for campaign_id in campaign_ids[:3]:
+                db.session.execute(CampaignLog.__table__.insert(), [
+                    {'campaign_id': campaign_id, 'action_type': 'web', 'target_url': 'https://example.com',
+                     'device_type': rng.choice(['Desktop', 'Mobile']), 'country': rng.choice(['US', 'ID']),
+                     'success': rng.random() < 0.75, 'timestamp': start + timedelta(minutes=i)}
+                    for i in range(logs_per_campaign)
+                ])
+            fixtures.append({
+                'username': user.username,
+                'user_id': user.id,
+                'effects': [row[0] for row in db.session.query(Effect.id).filter_by(user_id=user.id)],
+                'campaigns': campaign_ids,
+                'accounts': [row[0] for row in db.session.query(TikTokAccount.id).filter_by(user_id=user.id)],
+            })
+        db.session.commit()
+    return fixtures
+
+
+def build_request(label, fixture, rng):
+    """Return (method, path, body) for an endpoint label"""
+    effect = rng.choice(fixture['effects'])
+    campaign = rng.choice(fixture['campaigns'][:3])
+    account = rng.choice(fixture['accounts'])
+    name = f'load {rng.randrange(1 << 30)}'
+    requests = {
+        'GET /ping': ('GET', '/ping', None),
+        'POST /api/auth/login': ('POST', '/api/auth/login', {'username': fixture['username'], 'password': 'admin123'}),
+        'GET /api/auth/profile': ('GET', '/api/auth/profile', None),
+        'GET /api/users': ('GET', '/api/users?limit=50', None),
+        'GET /api/users/<id>': ('GET', f"/api/users/{fixture['user_id']}", None),
+        'GET /api/effects': ('GET', '/api/effects', None),
+        'POST /api/effects': ('POST', '/api/effects', {'effect_name': name, 'category': 'fun', 'tags': 'x', 'hint': 'y'}),
+        'PUT /api/effects/<id>': ('PUT', f'/api/effects/{effect}', {'hint': name}),
+        'GET /api/effects/<id>/status': ('GET', f'/api/effects/{effect}/status', None),
+        'GET /api/effects/<id>/analytics': ('GET', f'/api/effects/{effect}/analytics', None),
+        'GET /api/campaigns': ('GET', '/api/campaigns', None),
+        'POST /api/campaigns': ('POST', '/api/campaigns', {'campaign_name': name, 'campaign_type': 'web', 'target_count': 10}),
+        'PUT /api/campaigns/<id>': ('PUT', f'/api/campaigns/{campaign}', {'campaign_name': name}),
+        'GET /api/campaigns/<id>/stats': ('GET', f'/api/campaigns/{campaign}/stats', None),
+        'GET /api/campaigns/<id>/report': ('GET', f'/api/campaigns/{campaign}/report?group_by=country', None),
+        'GET /api/tiktok-accounts': ('GET', '/api/tiktok-accounts', None),
+        'POST /api/tiktok-accounts': ('POST', '/api/tiktok-accounts', {'account_username': name}),
+        'PUT /api/tiktok-accounts/<id>': ('PUT', f'/api/tiktok-accounts/{account}', {'account_username': name}),
+    }
+    return requests[label]
+
+
+def login(port, username):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    _, body = http_request(conn, 'POST', '/api/auth/login', {'Content-Type': 'application/json'},
+                           json.dumps({'username': username, 'password': 'admin123'}))
+    return json.loads(body)['token']
+
+
+def run_load(port, fixtures, mix, clients, duration, warmup, extra_headers):
+    tokens = {fixture['username']: login(port, fixture['username']) for fixture in fixtures}
+    labels = [label for _, label in MIXES[mix]]
+    weights = [weight for weight, _ in MIXES[mix]]
+
+    samples = {label: [] for label in labels}
+    errors = {label: 0 for label in labels}
+    bytes_received = {label: 0 for label in labels}
+    lock = threading.Lock()
+    started = time.time()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def client(index):
+        rng = random.Random(index)
+        fixture = fixtures[index % len(fixtures)]
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        headers = dict(extra_headers, Authorization=f"Bearer {tokens[fixture['username']]}")
+        while True:
+            now = time.time()
+            if now >= stop_at:
+                break
+            label = rng.choices(labels, weights)[0]
+            method, path, body = build_request(label, fixture, rng)
+            request_headers = dict(headers, **({'Content-Type': 'application/json'} if body is not None else {}))
+            began = time.perf_counter()
+            try:
+                status, payload = http_request(conn, method, path, request_headers,
+                                               json.dumps(body) if body is not None else None)
+            except (OSError, http.client.HTTPException):
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status, payload = 599, b''
+            elapsed = (time.perf_counter() - began) * 1000
+            if now < measure_from:
+                continue
+            with lock:
+                samples[label].append(elapsed)
+                bytes_received[label] += len(payload)
+                if status >= 400:
+                    errors[label] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    endpoints = {}
+    for label in labels:
+        values = sorted(samples[label])
+        if not values:
+            continue
+        endpoints[label] = {
+            'requests': len(values),
+            'errors': errors[label],
+            'rps': round(len(values) / duration, 2),
+            'p50_ms': round(percentile(values, 50), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2),
+            'mean_ms': round(statistics.fmean(values), 2),
+            'avg_bytes': round(bytes_received[label] / len(values)),
+        }
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {'total_rps': round(total / duration, 2), 'endpoints': endpoints}
+
+
+def percentile(values, p):
+    index = min(len(values) - 1, max(0, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def print_report(result):
+    print(f"{'endpoint':<36}{'req':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'bytes':>9}")
+    for label, stats in sorted(result['endpoints'].items()):
+        print(f"{label:<36}{stats['requests']:>7}{stats['errors']:>5}{stats['rps']:>9}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['avg_bytes']:>9}")
+    print(f"total: {result['total_rps']} req/s")
+
+
+def compare(baseline, current, threshold):
+    """Print p95/throughput deltas against a saved run; returns the list of regressions"""
+    regressions = []
+    print(f"\n{'endpoint':<36}{'p95 before':>12}{'p95 after':>12}{'change':>9}")
+    for label, stats in sorted(current['endpoints'].items()):
+        before = baseline['endpoints'].get(label)
+        if not before:
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        flag = ''
+        if change > threshold:
+            regressions.append(label)
+            flag = '  REGRESSION'
+        print(f"{label:<36}{before['p95_ms']:>12}{stats['p95_ms']:>12}{change:>8.1f}%{flag}")
+
+    change = (current['total_rps'] - baseline['total_rps']) / baseline['total_rps'] * 100 if baseline['total_rps'] else 0
+    print(f"{'total req/s':<36}{baseline['total_rps']:>12}{current['total_rps']:>12}{change:>8.1f}%")
+    if change < -threshold:
+        regressions.append('total_rps')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=200, help='effects/campaigns/accounts per user')
+    parser.add_argument('--logs', type=int, default=5000, help='logs for each of the first 3 campaigns per user')
+    parser.add_argument('--profile', default='auto', help='GUNICORN_PROFILE for the server')
+    parser.add_argument('--header', action='append', default=[], help='extra request header, e.g. "Accept-Encoding: gzip"')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=10, help='regression threshold in percent')
+    args = parser.parse_args()
+
+    database_url = os.environ.get('BENCH_DATABASE_URL') or temp_database_url('loadtest-')
+    init_database_url(database_url)
+    fixtures = seed(database_url, args.users, args.rows, args.logs)
+    extra_headers = dict(header.split(':', 1) for header in args.header)
+    extra_headers = {key.strip(): value.strip() for key, value in extra_headers.items()}
+
+    with gunicorn_server(database_url, GUNICORN_PROFILE=args.profile) as (port, _):
+        result = run_load(port, fixtures, args.mix, args.clients, args.duration, args.warmup, extra_headers)
+
+    result['config'] = {
+        'mix': args.mix, 'clients': args.clients, 'duration': args.duration, 'users': args.users,
+        'rows': args.rows, 'logs': args.logs, 'profile': args.profile, 'headers': extra_headers,
+        'database': database_url.split(':', 1)[0], 'python': platform.python_version(),
+        'cpus': os.cpu_count(), 'timestamp': datetime.utcnow().isoformat()
+    }
+    print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), result, args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -31,8 +31,10 @@ except Exception as e:
 
 if [ $? -eq 0 ]; then
     echo "✓ Application test passed"
+    echo "Applying database migrations..."
+    python -m src.init_db || exit 1
     echo "Starting gunicorn..."
-    exec gunicorn --workers 1 --bind 0.0.0.0:$PORT --timeout 120 --keep-alive 5 wsgi:app
+    exec gunicorn -c gunicorn.conf.py wsgi:app
 else
     echo "✗ Application test failed"
     exit 1
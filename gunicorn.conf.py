@@ -0,0 +1,114 @@
+"""
+Gunicorn settings. Picked up automatically when gunicorn starts from the repo
+root, or explicitly with `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+GUNICORN_PROFILE selects a serving profile:
+  auto     - small on hosts with < 1 GB of memory, otherwise gthread (default)
+  small    - one gthread worker with 8 threads, for tiny containers
+  gthread  - cores + 1 workers with 4 threads each
+  sync     - 2 * cores + 1 single-threaded workers
+WEB_CONCURRENCY and GUNICORN_THREADS override the worker and thread counts;
+GUNICORN_PRELOAD=False turns off preloading (for comparison only).
+
+With more than one worker, METRICS_DIR defaults to a fresh temporary directory
+so /metrics can merge every worker's counters (see src/services/metrics.py).
+
+The app is preloaded in the master and its objects are frozen out of the
+garbage collector before forking, so workers share those memory pages.
+"""
+import gc
+import os
+import tempfile
+
+# Approximate private memory a worker grows to under load
+WORKER_MEMORY_MB = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', '120'))
+
+def available_cores():
+    """CPUs this process may use, honouring a cgroup v2 CPU quota"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+def available_memory_mb():
+    """Container memory limit (cgroup v2/v1), falling back to physical memory"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != 'max' and int(value) < 1 << 50:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return 1024
+
+def select_profile(name, cores, memory_mb):
+    """Return (worker_class, workers, threads) for a profile"""
+    if name == 'auto':
+        name = 'small' if memory_mb < 1024 else 'gthread'
+
+    # Leave room for the master process and the OS
+    memory_cap = max(1, (memory_mb - 128) // WORKER_MEMORY_MB)
+    if name == 'small':
+        return 'gthread', 1, 8
+    if name == 'sync':
+        return 'sync', min(cores * 2 + 1, memory_cap), 1
+    if name == 'gthread':
+        return 'gthread', min(cores + 1, memory_cap), 4
+    raise ValueError(f'Unknown GUNICORN_PROFILE: {name}')
+
+profile = os.environ.get('GUNICORN_PROFILE', 'auto')
+worker_class, workers, threads = select_profile(profile, available_cores(), available_memory_mb())
+workers = int(os.environ.get('WEB_CONCURRENCY', workers))
+threads = int(os.environ.get('GUNICORN_THREADS', threads))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+timeout = 120
+keepalive = 5
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+if workers > 1 and not os.environ.get('METRICS_DIR'):
+    # Set before the app (and src.config) is loaded
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='earning-sakti-metrics-')
+
+if preload_app:
+    # Keep the collector from touching the preloaded app in the master; any
+    # collection would write to object headers and unshare pages with workers.
+    gc.disable()
+
+def when_ready(server):
+    server.log.info(f'Profile {profile}: {workers} x {worker_class} worker(s), {threads} thread(s) each')
+    if preload_app:
+        # Index the frontend build once in the master so workers share it
+        from src.services.static_index import static_index
+        static_index.load()
+
+def pre_fork(server, worker):
+    # Move everything the master has loaded into the permanent generation
+    gc.freeze()
+
+def post_fork(server, worker):
+    gc.enable()
+    if not preload_app:
+        return
+    from src.main import app, reset_after_fork
+    reset_after_fork(app)
+
+def child_exit(server, worker):
+    from src.services.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
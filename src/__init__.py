@@ -1,21 +0,0 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
-
-db = SQLAlchemy()
-
-def create_app():
-    app = Flask(__name__)
-    
-    # Load configuration
-    app.config.from_pyfile('config.py')
-    
-    # Initialize extensions
-    db.init_app(app)
-    CORS(app, resources={r"/api/*": {"origins": app.config['ALLOWED_ORIGINS']}})
-    
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-    
-    return app
\ No newline at end of file
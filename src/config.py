@@ -8,9 +8,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 DEBUG = os.environ.get('DEBUG', 'False') == 'True'
 
-# Database
+# Database (the directory is created by `python -m src.init_db`)
 DB_PATH = BASE_DIR / 'database'
-DB_PATH.mkdir(exist_ok=True)
 
 # Use PostgreSQL in production, SQLite in development
 DATABASE_URL = os.environ.get('DATABASE_URL')
@@ -29,4 +28,96 @@ SQLALCHEMY_TRACK_MODIFICATIONS = False
 FRONTEND_BUILD_PATH = BASE_DIR / 'frontend-build'
 
 # CORS
-ALLOWED_ORIGINS = os.environ.get('ALLOWED_ORIGINS', '*').split(',')
\ No newline at end of file
+ALLOWED_ORIGINS = os.environ.get('ALLOWED_ORIGINS', '*').split(',')
+
+# Identity cache used by token_required. Invalidation is per worker, so other
+# workers may serve a changed or deleted user for up to IDENTITY_CACHE_TTL seconds
+IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', '5'))
+IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', '1024'))
+
+# Password hashing policy (werkzeug method string, e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000)
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+# Concurrent password hashes per worker, and how long a login waits for a free slot
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '5'))
+
+# Keyset pagination for list endpoints (?limit=&after=)
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+
+# CampaignLog rollups: log rows folded per transaction, minimum seconds
+# between incremental refreshes triggered by report reads, and how old a log
+# must be before it is folded (longer than any transaction that writes logs)
+ROLLUP_BATCH_SIZE = int(os.environ.get('ROLLUP_BATCH_SIZE', '50000'))
+ROLLUP_REFRESH_INTERVAL = float(os.environ.get('ROLLUP_REFRESH_INTERVAL', '60'))
+ROLLUP_SETTLE_SECONDS = float(os.environ.get('ROLLUP_SETTLE_SECONDS', '30'))
+
+# CampaignLog retention: rows older than this many days are archived and purged
+CAMPAIGN_LOG_RETENTION_DAYS = int(os.environ.get('CAMPAIGN_LOG_RETENTION_DAYS', '90'))
+CAMPAIGN_LOG_ARCHIVE_DIR = Path(os.environ.get('CAMPAIGN_LOG_ARCHIVE_DIR', BASE_DIR / 'archive' / 'campaign_logs'))
+CAMPAIGN_LOG_PURGE_BATCH = int(os.environ.get('CAMPAIGN_LOG_PURGE_BATCH', '5000'))
+# Rows fetched per server-side cursor round trip when exporting logs
+CAMPAIGN_LOG_EXPORT_CHUNK = int(os.environ.get('CAMPAIGN_LOG_EXPORT_CHUNK', '1000'))
+
+# Connection pool. Recycle stays below the ~5 minute idle timeout of the
+# Railway/Neon proxies; pre-ping and the statement timeout apply to Postgres.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '280'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True') == 'True'
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '15000'))
+# SQLite: WAL lets readers (exports, reports) run alongside writers
+SQLITE_WAL = os.environ.get('SQLITE_WAL', 'True') == 'True'
+
+# Metrics: per-worker snapshot directory (set by gunicorn.conf.py when it runs
+# several workers) and seconds between snapshot writes
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '1'))
+
+# SQL budgets per request: off | warn (log) | raise, and how many repeats of
+# one statement shape in a request count as an N+1 pattern
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'warn')
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '5'))
+
+# Logging: JSON lines on stdout written by a background thread (LOG_ASYNC).
+# LOG_SAMPLE_RATES keeps only a fraction of the info/debug records of chatty
+# loggers, e.g. "src.routes.core.ping=0.01"; warnings are always kept.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_ASYNC = os.environ.get('LOG_ASYNC', 'True') == 'True'
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', 'src.routes.core.ping=0.01,src.routes.core.health=0.1')
+
+# Seconds between background database probes served by /health and /ready
+HEALTH_CHECK_INTERVAL = float(os.environ.get('HEALTH_CHECK_INTERVAL', '15'))
+
+# Frontend build served from memory: files larger than this stay on disk, and
+# STATIC_WATCH rescans the build directory every STATIC_WATCH_INTERVAL seconds
+STATIC_MEMORY_FILE_LIMIT = int(os.environ.get('STATIC_MEMORY_FILE_LIMIT', str(2 * 1024 * 1024)))
+STATIC_WATCH = os.environ.get('STATIC_WATCH', 'False') == 'True'
+STATIC_WATCH_INTERVAL = float(os.environ.get('STATIC_WATCH_INTERVAL', '2'))
+
+# Response compression (gzip, or brotli when installed) for API payloads
+COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True') == 'True'
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '4'))
+COMPRESS_MIMETYPES = set(os.environ.get('COMPRESS_MIMETYPES', 'application/json,text/plain,text/csv').split(','))
+
+# Effect House analytics cache (per effect id); stale entries are served while
+# a background refresh runs for up to ANALYTICS_CACHE_STALE_TTL seconds past the TTL
+ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', '300'))
+ANALYTICS_CACHE_STALE_TTL = int(os.environ.get('ANALYTICS_CACHE_STALE_TTL', '600'))
+ANALYTICS_CACHE_SIZE = int(os.environ.get('ANALYTICS_CACHE_SIZE', '10000'))
+ANALYTICS_REFRESH_WORKERS = int(os.environ.get('ANALYTICS_REFRESH_WORKERS', '2'))
+
+# Daily analytics snapshots: days fetched for an effect's first ingest, and
+# snapshot rows written per transaction
+ANALYTICS_SNAPSHOT_BACKFILL_DAYS = int(os.environ.get('ANALYTICS_SNAPSHOT_BACKFILL_DAYS', '90'))
+ANALYTICS_SNAPSHOT_BATCH_SIZE = int(os.environ.get('ANALYTICS_SNAPSHOT_BATCH_SIZE', '5000'))
+# Background threads ingesting snapshots for users who open a report
+ANALYTICS_SNAPSHOT_WORKERS = int(os.environ.get('ANALYTICS_SNAPSHOT_WORKERS', '2'))
+
+# Maximum effect ids per batch request (status checks, bulk create/update/delete)
+EFFECT_BATCH_MAX_IDS = int(os.environ.get('EFFECT_BATCH_MAX_IDS', '500'))
@@ -1,21 +1,39 @@
-from flask import Flask
-from .models.user import db
-from .config import SQLALCHEMY_DATABASE_URI
+import logging
+from .models.user import db, User
+from .migrations import upgrade
+from .config import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+def init_database(app=None):
+    """One-time setup: apply pending migrations and create the default admin user"""
+    # Directory for the local SQLite database
+    DB_PATH.mkdir(exist_ok=True)
+
+    if app is None:
+        from .main import create_app
+        app = create_app()
 
-def init_database():
-    """Initialize the database with all tables"""
-    app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    db.init_app(app)
-    
     with app.app_context():
         try:
-            db.create_all()
-            print("Database tables created successfully")
+            applied = upgrade()
+            logger.info(f"Database migrations applied: {applied}" if applied else "Database schema is up to date")
+
+            # Create default user if not exists
+            if not User.query.filter_by(username='admin').first():
+                user = User(
+                    username='admin',
+                    email='admin@example.com'
+                )
+                user.set_password('admin123')
+                db.session.add(user)
+                db.session.commit()
+                logger.info("✅ Default user created: admin/admin123")
+            else:
+                logger.info("ℹ️ Default user already exists: admin/admin123")
         except Exception as e:
-            print(f"Error creating database tables: {e}")
+            logger.error(f"Error initializing database: {e}")
             raise
 
 if __name__ == '__main__':
-    init_database() 
\ No newline at end of file
+    init_database()
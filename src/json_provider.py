@@ -0,0 +1,61 @@
+"""
+orjson-backed JSON provider, used when orjson is installed (`pip install orjson`).
+
+Like Flask's default provider, keys are sorted, datetimes and dates become
+HTTP dates, Decimals become strings, and responses are indented in debug
+mode. Unlike it, non-ASCII text is written as raw UTF-8 instead of \\u
+escapes (the same JSON once decoded). Values orjson refuses, such as
+integers wider than 64 bits, fall back to the stdlib encoder.
+"""
+from datetime import date
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj):
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+class ORJSONProvider(DefaultJSONProvider):
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        # Calls with stdlib json options (indent=, cls=, ...) keep the stdlib path
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=_default, option=self.options).decode()
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self.options
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        try:
+            body = orjson.dumps(obj, default=_default, option=options | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_app(app):
+    """Use orjson for request and response JSON when it is available"""
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
@@ -0,0 +1,261 @@
+"""
+Versioned schema migrations for SQLite and PostgreSQL.
+
+Each migration runs once, in version order, inside its own transaction and is
+recorded in the schema_migrations table.
+
+    python -m src.migrations upgrade
+    python -m src.migrations status
+    python -m src.migrations check-indexes
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, ForeignKey, Index, UniqueConstraint,
+    Boolean, Date, DateTime, Float, Integer, String, Text, inspect, select, text
+)
+from .models.user import db
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent upgrades run one at a time
+ADVISORY_LOCK_ID = 7342001
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register an upgrade function taking a Connection"""
+    def register(upgrade):
+        MIGRATIONS.append((version, description, upgrade))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return upgrade
+    return register
+
+# Each migration pins the schema as it stood at its version: its own MetaData,
+# with only the columns of earlier tables that its foreign keys and indexes
+# reference. Never import models here; they describe the latest schema.
+
+def _create_tables(connection, metadata, *names):
+    metadata.create_all(connection, tables=[metadata.tables[name] for name in names], checkfirst=True)
+
+def _referenced(metadata, name, *columns):
+    """An existing table, reduced to the columns a later migration refers to"""
+    return Table(name, metadata, Column('id', Integer, primary_key=True),
+                 *(Column(column, type_) for column, type_ in columns))
+
+@migration(1, 'Core tables')
+def _core_tables(connection):
+    metadata = MetaData()
+    Table(
+        'user', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('username', String(50), unique=True, nullable=False),
+        Column('email', String(100), unique=True, nullable=False),
+        Column('password_hash', String(255), nullable=False),
+        Column('created_at', DateTime),
+        Column('is_active', Boolean)
+    )
+    Table(
+        'tik_tok_account', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+        Column('account_username', String(50), nullable=False),
+        Column('cookies_data', Text),
+        Column('is_active', Boolean),
+        Column('created_at', DateTime),
+        Column('last_used', DateTime)
+    )
+    Table(
+        'effect', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+        Column('effect_name', String(100), nullable=False),
+        Column('effect_file_path', String(255)),
+        Column('icon_path', String(255)),
+        Column('category', String(50)),
+        Column('tags', Text),
+        Column('hint', String(100)),
+        Column('status', String(20)),
+        Column('created_at', DateTime)
+    )
+    Table(
+        'campaign', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+        Column('campaign_name', String(100), nullable=False),
+        Column('campaign_type', String(50), nullable=False),
+        Column('target_urls', Text),
+        Column('target_countries', Text),
+        Column('device_types', Text),
+        Column('traffic_sources', Text),
+        Column('target_count', Integer),
+        Column('current_count', Integer),
+        Column('status', String(20)),
+        Column('created_at', DateTime)
+    )
+    Table(
+        'campaign_log', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('campaign_id', Integer, ForeignKey('campaign.id'), nullable=False),
+        Column('action_type', String(50), nullable=False),
+        Column('target_url', String(255)),
+        Column('device_type', String(50)),
+        Column('country', String(10)),
+        Column('success', Boolean),
+        Column('timestamp', DateTime)
+    )
+    _create_tables(connection, metadata, 'user', 'tik_tok_account', 'effect', 'campaign', 'campaign_log')
+
+@migration(2, 'CampaignLog rollup and watermark tables')
+def _rollup_tables(connection):
+    metadata = MetaData()
+    _referenced(metadata, 'campaign')
+    Table(
+        'campaign_log_rollup', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('granularity', String(10), nullable=False),
+        Column('bucket_start', DateTime, nullable=False),
+        Column('campaign_id', Integer, ForeignKey('campaign.id'), nullable=False),
+        Column('country', String(10), nullable=False),
+        Column('device_type', String(50), nullable=False),
+        Column('success', Boolean, nullable=False),
+        Column('actions', Integer, nullable=False),
+        UniqueConstraint('granularity', 'bucket_start', 'campaign_id', 'country', 'device_type', 'success',
+                         name='uq_campaign_log_rollup_key'),
+        Index('ix_campaign_log_rollup_campaign_bucket', 'campaign_id', 'granularity', 'bucket_start')
+    )
+    Table(
+        'rollup_watermark', metadata,
+        Column('name', String(50), primary_key=True),
+        Column('last_id', Integer, nullable=False),
+        Column('updated_at', DateTime)
+    )
+    _create_tables(connection, metadata, 'campaign_log_rollup', 'rollup_watermark')
+
+@migration(3, 'Indexes for per-user lists and campaign logs')
+def _hot_path_indexes(connection):
+    metadata = MetaData()
+    tik_tok_account = _referenced(metadata, 'tik_tok_account', ('user_id', Integer))
+    effect = _referenced(metadata, 'effect', ('user_id', Integer), ('status', String(20)))
+    campaign = _referenced(metadata, 'campaign', ('user_id', Integer))
+    campaign_log = _referenced(metadata, 'campaign_log', ('campaign_id', Integer), ('timestamp', DateTime))
+    for index in (
+        Index('ix_tik_tok_account_user_id_id', tik_tok_account.c.user_id, tik_tok_account.c.id),
+        Index('ix_effect_user_id_id', effect.c.user_id, effect.c.id),
+        Index('ix_effect_user_id_status', effect.c.user_id, effect.c.status),
+        Index('ix_campaign_user_id_id', campaign.c.user_id, campaign.c.id),
+        Index('ix_campaign_log_campaign_id_timestamp', campaign_log.c.campaign_id, campaign_log.c.timestamp),
+    ):
+        index.create(connection, checkfirst=True)
+
+@migration(4, 'Per-user change versions for conditional list responses')
+def _change_versions(connection):
+    metadata = MetaData()
+    _referenced(metadata, 'user')
+    Table(
+        'user_change_version', metadata,
+        Column('user_id', Integer, ForeignKey('user.id'), primary_key=True),
+        Column('version', Integer, nullable=False)
+    )
+    _create_tables(connection, metadata, 'user_change_version')
+
+@migration(5, 'Daily Effect House analytics snapshots')
+def _analytics_snapshots(connection):
+    metadata = MetaData()
+    _referenced(metadata, 'effect')
+    Table(
+        'analytics_snapshot', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('effect_id', Integer, ForeignKey('effect.id'), nullable=False),
+        Column('day', Date, nullable=False),
+        Column('views', Integer, nullable=False),
+        Column('uses', Integer, nullable=False),
+        Column('earnings', Float, nullable=False),
+        UniqueConstraint('effect_id', 'day', name='uq_analytics_snapshot_effect_day')
+    )
+    _create_tables(connection, metadata, 'analytics_snapshot')
+
+# (table, leading index columns, query that needs them)
+KNOWN_QUERY_SHAPES = [
+    ('tik_tok_account', ('user_id', 'id'), 'GET /api/tiktok-accounts: user_id = ? ORDER BY id'),
+    ('effect', ('user_id', 'id'), 'GET /api/effects: user_id = ? ORDER BY id'),
+    ('effect', ('user_id', 'status'), 'earnings report: user_id = ? AND status = ?'),
+    ('campaign', ('user_id', 'id'), 'GET /api/campaigns: user_id = ? ORDER BY id'),
+    ('campaign_log', ('campaign_id', 'timestamp'), 'campaign stats/export/retention: campaign_id = ? ORDER BY timestamp'),
+    ('campaign_log_rollup', ('campaign_id', 'granularity', 'bucket_start'), 'campaign report: bucket range per campaign'),
+    ('analytics_snapshot', ('effect_id', 'day'), 'earnings report: day range per effect'),
+]
+
+def applied_versions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+def upgrade(engine=None):
+    """Apply pending migrations. Returns the versions that were applied."""
+    engine = engine or db.engine
+    applied = []
+    for version, description, upgrade_fn in MIGRATIONS:
+        with engine.begin() as connection:
+            if engine.dialect.name == 'postgresql':
+                connection.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': ADVISORY_LOCK_ID})
+            if version in applied_versions(connection):
+                continue
+            upgrade_fn(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+            applied.append(version)
+    return applied
+
+def status(engine=None):
+    """List (version, description, applied) for every known migration"""
+    engine = engine or db.engine
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    return [(version, description, version in done) for version, description, _ in MIGRATIONS]
+
+def missing_indexes(engine=None):
+    """Known query shapes whose leading columns no index (or primary key) covers"""
+    inspector = inspect(engine or db.engine)
+    missing = []
+    for table, columns, query in KNOWN_QUERY_SHAPES:
+        if not inspector.has_table(table):
+            missing.append((table, columns, query))
+            continue
+        candidates = [tuple(index['column_names']) for index in inspector.get_indexes(table)]
+        candidates += [tuple(constraint['column_names']) for constraint in inspector.get_unique_constraints(table)]
+        candidates.append(tuple(inspector.get_pk_constraint(table)['constrained_columns']))
+        if not any(candidate[:len(columns)] == columns for candidate in candidates):
+            missing.append((table, columns, query))
+    return missing
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from .main import app
+
+    parser = argparse.ArgumentParser(description='Database schema migrations')
+    parser.add_argument('command', choices=['upgrade', 'status', 'check-indexes'])
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == 'upgrade':
+            versions = upgrade()
+            sys.stdout.write(f"Applied migrations: {versions}\n" if versions else "Database is up to date\n")
+        elif args.command == 'status':
+            for version, description, done in status():
+                sys.stdout.write(f"{version:>4}  {'applied' if done else 'pending':<8} {description}\n")
+        else:
+            missing = missing_indexes()
+            for table, columns, query in missing:
+                sys.stdout.write(f"MISSING {table}({', '.join(columns)}) for {query}\n")
+            if not missing:
+                sys.stdout.write("All known query shapes are indexed\n")
+            sys.exit(1 if missing else 0)
@@ -0,0 +1,38 @@
+"""
+SQL constructs that differ between the SQLite and PostgreSQL backends.
+"""
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from .user import db
+
+BUCKET_FORMATS = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00'
+}
+
+def dialect_name():
+    return db.session.get_bind().dialect.name
+
+def insert(table):
+    """INSERT that supports on_conflict_do_update/on_conflict_do_nothing"""
+    name = dialect_name()
+    if name == 'postgresql':
+        return postgresql.insert(table)
+    if name == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f'Upsert is not supported on {name}')
+
+def time_bucket(granularity, column):
+    """Truncate a timestamp column to the start of its hour or day"""
+    if granularity not in BUCKET_FORMATS:
+        raise ValueError(f'Unknown granularity: {granularity}')
+    if dialect_name() == 'postgresql':
+        return func.date_trunc(granularity, column)
+    return func.strftime(BUCKET_FORMATS[granularity], column)
+
+def bucket_value(value):
+    """SQLite returns time_bucket() as text; normalise it to a datetime"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
@@ -0,0 +1,112 @@
+"""
+Engine options for the connection pool and pool statistics for /health.
+"""
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from ..config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS, SQLITE_WAL
+)
+
+class PoolWaitStats:
+    """Time spent waiting for a pooled connection, with recent samples for percentiles"""
+
+    def __init__(self, samples=1000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=samples)
+        self.checkouts = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._recent.append(seconds)
+
+    def to_dict(self):
+        with self._lock:
+            recent = sorted(self._recent)
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 3) if recent else 0
+
+        return {
+            'checkouts': self.checkouts,
+            'avg_ms': round(self.total / self.checkouts * 1000, 3) if self.checkouts else 0,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    if database_uri.startswith('postgresql'):
+        return {
+            'poolclass': TimedQueuePool,
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_recycle': DB_POOL_RECYCLE,
+            'pool_pre_ping': DB_POOL_PRE_PING
+        }
+    if database_uri.startswith('sqlite') and ':memory:' not in database_uri and database_uri != 'sqlite://':
+        # Local file: no proxy in between, so no recycle or pre-ping needed
+        return {
+            'poolclass': TimedQueuePool,
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'connect_args': {'timeout': DB_POOL_TIMEOUT}
+        }
+    return {}
+
+def configure_engine(engine):
+    """Per-connection session settings; call once for each new engine"""
+    if engine.dialect.name == 'postgresql' and DB_STATEMENT_TIMEOUT_MS > 0:
+        @event.listens_for(engine, 'connect')
+        def set_statement_timeout(dbapi_connection, connection_record):
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'SET statement_timeout = {DB_STATEMENT_TIMEOUT_MS}')
+            dbapi_connection.commit()
+
+    if engine.dialect.name == 'sqlite' and SQLITE_WAL:
+        @event.listens_for(engine, 'connect')
+        def set_wal_mode(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.close()
+
+def pool_status(engine):
+    """Checked-out/idle connection counts and checkout wait times of an engine's pool"""
+    pool = engine.pool
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0)
+        })
+    wait_stats = getattr(pool, 'wait_stats', None)
+    if wait_stats is not None:
+        status['wait'] = wait_stats.to_dict()
+    return status
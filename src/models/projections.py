@@ -0,0 +1,40 @@
+"""
+Column projections for list endpoints.
+
+A Projection selects exactly the columns a model's to_dict() emits and turns
+the result rows into the same dicts, so large lists are serialized straight
+from row tuples without building ORM instances.
+"""
+from .user import db, User, TikTokAccount, Effect, Campaign
+
+class Projection:
+    def __init__(self, *columns):
+        self.columns = columns
+        self.keys = tuple(column.key for column in columns)
+        self._datetimes = tuple(i for i, column in enumerate(columns) if isinstance(column.type, db.DateTime))
+
+    def query(self, *criteria):
+        return db.session.query(*self.columns).filter(*criteria)
+
+    def to_dict(self, row):
+        if not self._datetimes:
+            return dict(zip(self.keys, row))
+        values = list(row)
+        for i in self._datetimes:
+            if values[i] is not None:
+                values[i] = values[i].isoformat()
+        return dict(zip(self.keys, values))
+
+# Same keys and values as the models' to_dict()
+USER_LIST = Projection(User.id, User.username, User.email, User.created_at, User.is_active)
+TIKTOK_ACCOUNT_LIST = Projection(
+    TikTokAccount.id, TikTokAccount.account_username, TikTokAccount.is_active,
+    TikTokAccount.created_at, TikTokAccount.last_used
+)
+EFFECT_LIST = Projection(
+    Effect.id, Effect.effect_name, Effect.category, Effect.tags, Effect.hint, Effect.status, Effect.created_at
+)
+CAMPAIGN_LIST = Projection(
+    Campaign.id, Campaign.campaign_name, Campaign.campaign_type, Campaign.target_count,
+    Campaign.current_count, Campaign.status, Campaign.created_at
+)
@@ -1,9 +1,43 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from ..config import PASSWORD_HASH_METHOD
 
 db = SQLAlchemy()
 
+class PasswordHashPolicy:
+    """Algorithm and cost used for stored password hashes"""
+
+    # Werkzeug defaults for parameters left out of a method string
+    DEFAULTS = {
+        'scrypt': ['scrypt', str(2 ** 15), '8', '1'],
+        'pbkdf2': ['pbkdf2', 'sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    }
+
+    def __init__(self, method):
+        self.method = self.normalize(method)
+
+    @classmethod
+    def normalize(cls, method):
+        """Expand a method such as 'pbkdf2' to the full form werkzeug stores in the hash"""
+        parts = method.split(':')
+        if parts[0] not in cls.DEFAULTS:
+            raise ValueError(f'Unsupported password hash method: {method}')
+        defaults = cls.DEFAULTS[parts[0]]
+        return ':'.join(parts + defaults[len(parts):])
+
+    def hash(self, password):
+        return generate_password_hash(password, method=self.method)
+
+    def verify(self, password_hash, password):
+        return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a different algorithm or cost"""
+        return password_hash.split('$', 1)[0] != self.method
+
+password_policy = PasswordHashPolicy(PASSWORD_HASH_METHOD)
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -18,10 +52,13 @@ class User(db.Model):
     campaigns = db.relationship('Campaign', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_policy.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_policy.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_policy.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -36,10 +73,15 @@ class User(db.Model):
         }
 
 class TikTokAccount(db.Model):
+    __table_args__ = (
+        db.Index('ix_tik_tok_account_user_id_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     account_username = db.Column(db.String(50), nullable=False)
-    cookies_data = db.Column(db.Text)
+    # Deferred: never part of to_dict(); undefer where the cookies are used
+    cookies_data = db.deferred(db.Column(db.Text))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_used = db.Column(db.DateTime)
@@ -54,6 +96,11 @@ class TikTokAccount(db.Model):
         }
 
 class Effect(db.Model):
+    __table_args__ = (
+        db.Index('ix_effect_user_id_id', 'user_id', 'id'),
+        db.Index('ix_effect_user_id_status', 'user_id', 'status'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     effect_name = db.Column(db.String(100), nullable=False)
@@ -77,14 +124,19 @@ class Effect(db.Model):
         }
 
 class Campaign(db.Model):
+    __table_args__ = (
+        db.Index('ix_campaign_user_id_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     campaign_name = db.Column(db.String(100), nullable=False)
     campaign_type = db.Column(db.String(50), nullable=False)  # 'web', 'youtube', 'soundon', 'adisterra', 'effect_house'
-    target_urls = db.Column(db.Text)
-    target_countries = db.Column(db.Text)
-    device_types = db.Column(db.Text)
-    traffic_sources = db.Column(db.Text)
+    # JSON targeting lists, deferred as one group; only the simulation reads them
+    target_urls = db.deferred(db.Column(db.Text), group='targeting')
+    target_countries = db.deferred(db.Column(db.Text), group='targeting')
+    device_types = db.deferred(db.Column(db.Text), group='targeting')
+    traffic_sources = db.deferred(db.Column(db.Text), group='targeting')
     target_count = db.Column(db.Integer, default=0)
     current_count = db.Column(db.Integer, default=0)
     status = db.Column(db.String(20), default='inactive')
@@ -105,6 +157,10 @@ class Campaign(db.Model):
         }
 
 class CampaignLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_campaign_log_campaign_id_timestamp', 'campaign_id', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
     action_type = db.Column(db.String(50), nullable=False)
@@ -125,3 +181,65 @@ class CampaignLog(db.Model):
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
 
+
+class CampaignLogRollup(db.Model):
+    """CampaignLog action counts pre-aggregated into hourly and daily buckets"""
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'campaign_id', 'country', 'device_type', 'success',
+                            name='uq_campaign_log_rollup_key'),
+        db.Index('ix_campaign_log_rollup_campaign_bucket', 'campaign_id', 'granularity', 'bucket_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # 'hour', 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
+    # Unknown country/device are stored as '' so they still match the unique key
+    country = db.Column(db.String(10), nullable=False, default='')
+    device_type = db.Column(db.String(50), nullable=False, default='')
+    success = db.Column(db.Boolean, nullable=False)
+    actions = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'campaign_id': self.campaign_id,
+            'country': self.country,
+            'device_type': self.device_type,
+            'success': self.success,
+            'actions': self.actions
+        }
+
+class RollupWatermark(db.Model):
+    """Highest source row id already folded into a rollup table"""
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class UserChangeVersion(db.Model):
+    """Counter bumped whenever a user's effects, campaigns or TikTok accounts change"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class AnalyticsSnapshot(db.Model):
+    """Effect House analytics of one effect for one complete UTC day"""
+    __table_args__ = (
+        db.UniqueConstraint('effect_id', 'day', name='uq_analytics_snapshot_effect_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    effect_id = db.Column(db.Integer, db.ForeignKey('effect.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    uses = db.Column(db.Integer, nullable=False, default=0)
+    earnings = db.Column(db.Float, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'effect_id': self.effect_id,
+            'day': self.day.isoformat() if self.day else None,
+            'views': self.views,
+            'uses': self.uses,
+            'earnings': self.earnings
+        }
@@ -1,12 +1,76 @@
 from flask import Blueprint, request, jsonify, session
-from ..models.user import db, User
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from ..models.user import db, User, password_policy
+from ..services.cache import TTLCache
 import jwt
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from ..config import SECRET_KEY
+from ..config import (
+    SECRET_KEY, IDENTITY_CACHE_TTL, IDENTITY_CACHE_SIZE,
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_TIMEOUT
+)
 
 auth_bp = Blueprint('auth', __name__)
 
+# Authenticated users keyed by user id, so token_required can skip the
+# per-request SELECT. user_bp invalidates an entry when it changes a user,
+# but only in its own process: other gunicorn workers keep serving the old
+# copy (including a deleted or deactivated user) until the entry expires,
+# which is why IDENTITY_CACHE_TTL stays at a few seconds.
+identity_cache = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+
+def _identity_snapshot(user):
+    """Detached copy of a user's column values that is safe to share between requests"""
+    snapshot = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+def load_identity(user_id):
+    """Return the user for a token, served from the identity cache when possible"""
+    snapshot = identity_cache.get(user_id)
+    if snapshot is not None:
+        # Attach the cached copy to this request's session without a SELECT
+        return db.session.merge(snapshot, load=False)
+
+    user = User.query.filter_by(id=user_id).first()
+    if user:
+        identity_cache.set(user_id, _identity_snapshot(user))
+    return user
+
+class HashingBusyError(Exception):
+    """Raised when every password hashing slot stays busy for PASSWORD_HASH_TIMEOUT"""
+
+# Password hashing is CPU bound, so it runs on a small pool. The semaphore
+# bounds the logins waiting for it; anything beyond that is turned away.
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS)
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+def _get_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+        return _hash_executor
+
+def reset_hash_executor():
+    """Drop the hashing pool; its threads do not survive a fork"""
+    global _hash_executor
+    with _hash_executor_lock:
+        _hash_executor = None
+
+def run_password_hash(fn, *args):
+    """Run a password hash function on the bounded hashing pool"""
+    if not _hash_slots.acquire(timeout=PASSWORD_HASH_TIMEOUT):
+        raise HashingBusyError()
+    try:
+        return _get_hash_executor().submit(fn, *args).result()
+    finally:
+        _hash_slots.release()
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -18,7 +82,7 @@ def token_required(f):
             if token.startswith('Bearer '):
                 token = token[7:]
             data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = User.query.filter_by(id=data['user_id']).first()
+            current_user = load_identity(data['user_id'])
             if not current_user:
                 return jsonify({'message': 'Token is invalid!'}), 401
         except:
@@ -47,13 +111,15 @@ def register():
             username=data['username'],
             email=data['email']
         )
-        user.set_password(data['password'])
+        user.password_hash = run_password_hash(password_policy.hash, data['password'])
         
         db.session.add(user)
         db.session.commit()
         
         return jsonify({'message': 'User created successfully'}), 201
     
+    except HashingBusyError:
+        return jsonify({'message': 'Server busy, please retry'}), 503
     except Exception as e:
         return jsonify({'message': f'Error creating user: {str(e)}'}), 500
 
@@ -65,15 +131,19 @@ def login():
         if not data or not data.get('username') or not data.get('password'):
             return jsonify({'message': 'Missing username or password'}), 400
         
-        # Test database connectivity first
-        try:
-            db.session.execute(db.text('SELECT 1'))
-        except Exception as db_error:
-            return jsonify({'message': 'Database connection error'}), 503
-        
         user = User.query.filter_by(username=data['username']).first()
         
-        if user and user.check_password(data['password']):
+        if user and run_password_hash(password_policy.verify, user.password_hash, data['password']):
+            if user.password_needs_rehash():
+                # Move the stored hash to the current policy while we know the password
+                try:
+                    user.password_hash = run_password_hash(password_policy.hash, data['password'])
+                    db.session.commit()
+                    identity_cache.invalidate(user.id)
+                except Exception:
+                    # A failed rehash must not fail an otherwise valid login
+                    db.session.rollback()
+
             token = jwt.encode({
                 'user_id': user.id,
                 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
@@ -86,6 +156,8 @@ def login():
         
         return jsonify({'message': 'Invalid credentials'}), 401
     
+    except HashingBusyError:
+        return jsonify({'message': 'Server busy, please retry'}), 503
     except Exception as e:
         return jsonify({'message': f'Error during login: {str(e)}'}), 500
 
@@ -1,6 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from ..models.user import db, Campaign, CampaignLog
+from ..models.projections import CAMPAIGN_LIST
+from sqlalchemy import func, case
+from sqlalchemy.orm import undefer_group
 from .auth import token_required
+from .pagination import paginate, InvalidCursor
+from ..services.query_budget import query_budget
+from ..services.change_versions import versioned_etag
+from ..services.campaign_rollup_service import campaign_rollup_service
+from ..services.campaign_log_service import campaign_log_service
+from datetime import datetime, timedelta
 import json
 import threading
 import time
@@ -9,13 +18,20 @@ import random
 campaigns_bp = Blueprint('campaigns', __name__)
 
 @campaigns_bp.route('/campaigns', methods=['GET'])
+@query_budget(3)
 @token_required
+@versioned_etag
 def get_campaigns(current_user):
     try:
-        campaigns = Campaign.query.filter_by(user_id=current_user.id).all()
+        campaigns, next_cursor = paginate(
+            CAMPAIGN_LIST.query(Campaign.user_id == current_user.id), Campaign.id, CAMPAIGN_LIST.to_dict
+        )
         return jsonify({
-            'campaigns': [campaign.to_dict() for campaign in campaigns]
+            'campaigns': campaigns,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'message': f'Error fetching campaigns: {str(e)}'}), 500
 
@@ -93,17 +109,22 @@ def delete_campaign(current_user, campaign_id):
         if not campaign:
             return jsonify({'message': 'Campaign not found'}), 404
         
+        # Logs go first in bounded set-based batches, so the ORM never loads them.
+        # Logs, rollups and the campaign share one transaction.
+        campaign_log_service.purge_campaign_logs(campaign_id, archive=False, commit=False)
+        campaign_rollup_service.delete_campaign(campaign_id)
         db.session.delete(campaign)
         db.session.commit()
         
         return jsonify({'message': 'Campaign deleted successfully'}), 200
     
     except Exception as e:
+        db.session.rollback()
         return jsonify({'message': f'Error deleting campaign: {str(e)}'}), 500
 
 def run_campaign_simulation(campaign_id):
     """Simulate campaign execution in background"""
-    campaign = Campaign.query.get(campaign_id)
+    campaign = Campaign.query.options(undefer_group('targeting')).get(campaign_id)
     if not campaign:
         return
     
@@ -186,6 +207,7 @@ def stop_campaign(current_user, campaign_id):
         return jsonify({'message': f'Error stopping campaign: {str(e)}'}), 500
 
 @campaigns_bp.route('/campaigns/<int:campaign_id>/stats', methods=['GET'])
+@query_budget(5)
 @token_required
 def get_campaign_stats(current_user, campaign_id):
     try:
@@ -194,14 +216,22 @@ def get_campaign_stats(current_user, campaign_id):
         if not campaign:
             return jsonify({'message': 'Campaign not found'}), 404
         
-        logs = CampaignLog.query.filter_by(campaign_id=campaign_id).all()
+        total, successful = db.session.query(
+            func.count(CampaignLog.id),
+            func.coalesce(func.sum(case((CampaignLog.success, 1), else_=0)), 0)
+        ).filter(CampaignLog.campaign_id == campaign_id).one()
+        
+        # Last 10 logs via the (campaign_id, timestamp) index, returned oldest first
+        recent_logs = CampaignLog.query.filter_by(campaign_id=campaign_id).order_by(
+            CampaignLog.timestamp.desc(), CampaignLog.id.desc()
+        ).limit(10).all()
         
         stats = {
-            'total_actions': len(logs),
-            'successful_actions': len([log for log in logs if log.success]),
-            'failed_actions': len([log for log in logs if not log.success]),
-            'success_rate': (len([log for log in logs if log.success]) / len(logs) * 100) if logs else 0,
-            'recent_logs': [log.to_dict() for log in logs[-10:]]  # Last 10 logs
+            'total_actions': total,
+            'successful_actions': successful,
+            'failed_actions': total - successful,
+            'success_rate': (successful / total * 100) if total else 0,
+            'recent_logs': [log.to_dict() for log in reversed(recent_logs)]
         }
         
         return jsonify({
@@ -212,3 +242,68 @@ def get_campaign_stats(current_user, campaign_id):
     except Exception as e:
         return jsonify({'message': f'Error fetching campaign stats: {str(e)}'}), 500
 
+
+@campaigns_bp.route('/campaigns/<int:campaign_id>/report', methods=['GET'])
+@query_budget(3)
+@token_required
+def get_campaign_report(current_user, campaign_id):
+    """Action counts per hour/day bucket, read from the CampaignLog rollups and the unfolded tail"""
+    try:
+        campaign = Campaign.query.filter_by(id=campaign_id, user_id=current_user.id).first()
+        
+        if not campaign:
+            return jsonify({'message': 'Campaign not found'}), 404
+        
+        granularity = request.args.get('granularity', 'day')
+        group_by = [name for name in request.args.get('group_by', '').split(',') if name]
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=30)
+        
+        campaign_rollup_service.schedule_refresh()
+        buckets = campaign_rollup_service.query(campaign_id, start, end, granularity, group_by)
+        
+        return jsonify({
+            'campaign': campaign.to_dict(),
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'group_by': group_by,
+            'buckets': buckets
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error fetching campaign report: {str(e)}'}), 500
+
+@campaigns_bp.route('/campaigns/<int:campaign_id>/logs/export', methods=['GET'])
+@token_required
+def export_campaign_logs(current_user, campaign_id):
+    """Stream the campaign's full log history as NDJSON or CSV, optionally gzipped"""
+    try:
+        campaign = Campaign.query.filter_by(id=campaign_id, user_id=current_user.id).first()
+        
+        if not campaign:
+            return jsonify({'message': 'Campaign not found'}), 404
+        
+        fmt = request.args.get('format', 'ndjson')
+        compress = request.args.get('gzip', '').lower() in ('1', 'true')
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+        
+        if fmt not in ('ndjson', 'csv'):
+            return jsonify({'message': 'Unsupported format, use ndjson or csv'}), 400
+        
+        filename = f'campaign_{campaign_id}_logs.{fmt}' + ('.gz' if compress else '')
+        mimetype = 'application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+        
+        return Response(
+            stream_with_context(campaign_log_service.export(campaign_id, fmt, start, end, compress)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error exporting campaign logs: {str(e)}'}), 500
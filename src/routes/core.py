@@ -0,0 +1,148 @@
+import datetime
+import logging
+from flask import Blueprint, current_app, request, send_file, abort
+from ..models.user import db, User
+from ..models.pool import pool_status
+from .auth import identity_cache
+from ..services.health_monitor import health_monitor
+from ..services.effect_house_service import effect_house_service
+from ..services.static_index import static_index, ENCODINGS
+
+core_bp = Blueprint('core', __name__)
+
+logger = logging.getLogger(__name__)
+# Separate loggers so LOG_SAMPLE_RATES can thin out the probe endpoints
+health_logger = logging.getLogger(f'{__name__}.health')
+ping_logger = logging.getLogger(f'{__name__}.ping')
+
+# --- Healthcheck Endpoint ---
+@core_bp.route('/health')
+def health_check():
+    # Served from the background probe; never touches the database itself
+    health_logger.info("Health check requested")
+    health = health_monitor.snapshot()
+    # Report healthy even when the database is down; the warning carries the error
+    return {
+        'status': 'healthy',
+        'message': 'Earning Sakti Backend is running' if health['database'] != 'disconnected'
+        else 'Earning Sakti Backend is running (database warning)',
+        **health,
+        'pool': pool_status(db.engine),
+        'identity_cache': identity_cache.stats(),
+        'analytics_cache': effect_house_service.analytics_cache.stats(),
+        'timestamp': datetime.datetime.utcnow().isoformat()
+    }, 200
+
+# --- Readiness Endpoint ---
+@core_bp.route('/ready')
+def readiness_check():
+    """503 until this worker has a fresh, successful database probe and a warm pool"""
+    health = health_monitor.snapshot()
+    pool = pool_status(db.engine)
+    # A QueuePool is warm once it holds a connection; other pools once the probe ran
+    pool_warm = pool['idle'] + pool['checked_out'] > 0 if 'idle' in pool else health['checked']
+    ready = health['database'] == 'connected' and not health['stale'] and pool_warm
+    return {
+        'ready': ready,
+        'database': health,
+        'pool': {**pool, 'warm': pool_warm},
+        'caches': {
+            'identity': identity_cache.stats(),
+            'analytics': effect_house_service.analytics_cache.stats(),
+            'static': static_index.stats(),
+        },
+        'timestamp': datetime.datetime.utcnow().isoformat()
+    }, 200 if ready else 503
+
+# --- Test Endpoint ---
+@core_bp.route('/api/test')
+def test_endpoint():
+    return {'message': 'API is working correctly'}, 200
+
+# --- Create Default User Endpoint ---
+@core_bp.route('/api/create-default-user', methods=['POST'])
+def create_default_user():
+    try:
+        # Check if admin user already exists
+        existing_user = User.query.filter_by(username='admin').first()
+        if existing_user:
+            return {'message': 'Default user already exists', 'user': existing_user.to_dict()}, 200
+
+        # Create default user
+        user = User(
+            username='admin',
+            email='admin@example.com'
+        )
+        user.set_password('admin123')
+
+        db.session.add(user)
+        db.session.commit()
+
+        return {
+            'message': 'Default user created successfully',
+            'user': user.to_dict()
+        }, 201
+
+    except Exception as e:
+        db.session.rollback()
+        return {'error': f'Failed to create default user: {str(e)}'}, 500
+
+# --- Simple Health Check (no database) ---
+@core_bp.route('/ping')
+def ping():
+    ping_logger.info("Ping endpoint called")
+    return {'status': 'pong', 'message': 'Server is alive', 'timestamp': datetime.datetime.utcnow().isoformat()}, 200
+
+# --- Root Endpoint ---
+@core_bp.route('/')
+def root():
+    return {'message': 'Earning Sakti Backend API', 'status': 'running'}, 200
+
+# --- Route for Serving the React Frontend ---
+# Vite puts a content hash in every /assets file name, so they never change
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# index.html must be revalidated so new deploys are picked up (ETag makes that cheap)
+INDEX_CACHE_CONTROL = 'no-cache'
+FILE_CACHE_CONTROL = 'public, max-age=3600'
+
+def static_response(static_file, cache_control):
+    """Serve an indexed build file from memory, preferring a precompressed variant"""
+    served, encoding = static_file, None
+    for _, candidate in ENCODINGS:
+        variant = static_file.variants.get(candidate)
+        if variant is not None and request.accept_encodings[candidate]:
+            served, encoding = variant, candidate
+            break
+
+    if served.body is None:
+        response = send_file(served.path, mimetype=static_file.mimetype, conditional=False)
+    else:
+        response = current_app.response_class(served.body, mimetype=static_file.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if static_file.variants:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(served.etag)
+    response.last_modified = datetime.datetime.fromtimestamp(served.mtime, datetime.timezone.utc)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+@core_bp.route('/assets/<path:filename>')
+def serve_assets(filename):
+    static_file = static_index.get(f'assets/{filename}')
+    if static_file is None:
+        abort(404)
+    return static_response(static_file, ASSET_CACHE_CONTROL)
+
+@core_bp.route('/<path:path>')
+def serve_react_app(path):
+    # This catch-all route serves the React app and handles client-side routing.
+    static_file = static_index.get(path) if path != 'index.html' else None
+    if static_file is not None:
+        # If the requested path is a real file (e.g., favicon.ico), serve it.
+        return static_response(static_file, FILE_CACHE_CONTROL)
+    # Otherwise, serve the main index.html for React to handle routing.
+    index = static_index.get('index.html')
+    if index is None:
+        abort(404)
+    return static_response(index, INDEX_CACHE_CONTROL)
@@ -1,22 +1,41 @@
 from flask import Blueprint, request, jsonify
+from datetime import datetime
+from sqlalchemy import case, delete, insert, select, update
 from ..models.user import db, Effect, TikTokAccount
+from ..models.projections import EFFECT_LIST
+from ..models.dialect import dialect_name
 from .auth import token_required
+from .pagination import paginate, InvalidCursor
+from ..services.query_budget import query_budget
+from ..config import EFFECT_BATCH_MAX_IDS
+from ..services.change_versions import versioned_etag, bump_versions
 from ..services.effect_house_service import effect_house_service
+from ..services.analytics_snapshot_service import analytics_snapshot_service, REPORT_WINDOWS
 import os
+import logging
 import threading
 import time
 import random
 
 effects_bp = Blueprint('effects', __name__)
 
+logger = logging.getLogger(__name__)
+
 @effects_bp.route('/effects', methods=['GET'])
+@query_budget(3)
 @token_required
+@versioned_etag
 def get_effects(current_user):
     try:
-        effects = Effect.query.filter_by(user_id=current_user.id).all()
+        effects, next_cursor = paginate(
+            EFFECT_LIST.query(Effect.user_id == current_user.id), Effect.id, EFFECT_LIST.to_dict
+        )
         return jsonify({
-            'effects': [effect.to_dict() for effect in effects]
+            'effects': effects,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'message': f'Error fetching effects: {str(e)}'}), 500
 
@@ -91,23 +110,217 @@ def delete_effect(current_user, effect_id):
         if not effect:
             return jsonify({'message': 'Effect not found'}), 404
         
+        analytics_snapshot_service.delete_effect(effect_id)
         db.session.delete(effect)
         db.session.commit()
+        effect_house_service.invalidate_analytics(effect_id)
         
         return jsonify({'message': 'Effect deleted successfully'}), 200
     
     except Exception as e:
         return jsonify({'message': f'Error deleting effect: {str(e)}'}), 500
 
+# Writable fields for the bulk endpoints and their column length (None: Text)
+EFFECT_CREATE_FIELDS = {'effect_name': 100, 'category': 50, 'tags': None, 'hint': 100,
+                        'effect_file_path': 255, 'icon_path': 255}
+EFFECT_UPDATE_FIELDS = {'effect_name': 100, 'category': 50, 'tags': None, 'hint': 100, 'status': 20}
+
+def _field_errors(item, fields):
+    """Validation messages for one bulk item's writable fields"""
+    errors = []
+    unknown = set(item) - set(fields) - {'id'}
+    if unknown:
+        errors.append(f"Unknown fields: {', '.join(sorted(unknown))}")
+    for field, max_length in fields.items():
+        value = item.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            errors.append(f'{field} must be a string')
+        elif max_length is not None and len(value) > max_length:
+            errors.append(f'{field} is longer than {max_length} characters')
+    if 'effect_name' in item and not item['effect_name']:
+        errors.append('effect_name cannot be empty')
+    return errors
+
+def _bulk_items(data, key):
+    """The list under `key` in a bulk payload, or an error message"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not items or not isinstance(items, list):
+        return None, f'{key} must be a non-empty list'
+    if len(items) > EFFECT_BATCH_MAX_IDS:
+        return None, f'At most {EFFECT_BATCH_MAX_IDS} {key} per request'
+    return items, None
+
+def _is_effect_id(value):
+    # bool is a subclass of int, but true/false are not ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _owned_effect_ids(user_id, effect_ids):
+    return set(db.session.execute(
+        select(Effect.id).where(Effect.id.in_(effect_ids), Effect.user_id == user_id)
+    ).scalars())
+
+def _validation_failed(errors):
+    return jsonify({'message': 'Validation failed; nothing was applied', 'errors': errors}), 400
+
+@effects_bp.route('/effects/bulk', methods=['POST'])
+@query_budget(3)
+@token_required
+def bulk_create_effects(current_user):
+    try:
+        items, message = _bulk_items(request.get_json(silent=True), 'effects')
+        if message:
+            return jsonify({'message': message}), 400
+        
+        errors = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'message': 'Each effect must be an object'})
+                continue
+            problems = _field_errors(item, EFFECT_CREATE_FIELDS)
+            if item.get('effect_name') is None:
+                problems.append('Missing effect name')
+            if 'id' in item:
+                problems.append('id cannot be set on create')
+            errors.extend({'index': index, 'message': problem} for problem in problems)
+        if errors:
+            return _validation_failed(errors)
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                'user_id': current_user.id,
+                'status': 'draft',
+                'created_at': now,
+                **{field: item.get(field) or '' for field in EFFECT_CREATE_FIELDS}
+            }
+            for item in items
+        ]
+        # Multi-row INSERT ... RETURNING in as few statements as the driver allows.
+        # PostgreSQL returns the ids in payload order. On SQLite that ordering
+        # would fall back to one INSERT per row, but rowids are assigned in
+        # VALUES order under the write lock, so sorted ids line up with the payload.
+        stmt = insert(Effect)
+        if dialect_name() == 'postgresql':
+            effect_ids = list(db.session.execute(stmt.returning(Effect.id, sort_by_parameter_order=True), rows).scalars())
+        else:
+            effect_ids = sorted(db.session.execute(stmt.returning(Effect.id), rows).scalars())
+        # Bulk statements skip the unit of work, so bump the list version here
+        bump_versions(db.session, [current_user.id])
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(effect_ids)} effects created',
+            'results': [{'index': index, 'effect_id': effect_id} for index, effect_id in enumerate(effect_ids)]
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error creating effects: {str(e)}'}), 500
+
+@effects_bp.route('/effects/bulk', methods=['PUT'])
+@query_budget(4)
+@token_required
+def bulk_update_effects(current_user):
+    try:
+        items, message = _bulk_items(request.get_json(silent=True), 'effects')
+        if message:
+            return jsonify({'message': message}), 400
+        
+        # Ownership is checked up front so every problem is reported in one response
+        owned = _owned_effect_ids(current_user.id, [
+            item['id'] for item in items if isinstance(item, dict) and _is_effect_id(item.get('id'))
+        ])
+        errors = []
+        seen = set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not _is_effect_id(item.get('id')):
+                errors.append({'index': index, 'message': 'Each effect must be an object with an integer id'})
+                continue
+            problems = [] if item['id'] in owned else ['Effect not found']
+            problems += _field_errors(item, EFFECT_UPDATE_FIELDS)
+            if all(item.get(field) is None for field in EFFECT_UPDATE_FIELDS):
+                problems.append('No fields to update')
+            if item['id'] in seen:
+                problems.append('Duplicate id')
+            seen.add(item['id'])
+            errors.extend({'index': index, 'effect_id': item['id'], 'message': problem} for problem in problems)
+        if errors:
+            return _validation_failed(errors)
+        
+        # One set-based UPDATE: each field becomes CASE id WHEN ... END, keeping
+        # the current value for effects that do not set it
+        values = {}
+        for field in EFFECT_UPDATE_FIELDS:
+            by_id = {item['id']: item[field] for item in items if item.get(field) is not None}
+            if by_id:
+                values[field] = case(by_id, value=Effect.id, else_=getattr(Effect, field))
+        db.session.execute(
+            update(Effect).where(Effect.id.in_(owned), Effect.user_id == current_user.id).values(values)
+            .execution_options(synchronize_session=False)
+        )
+        bump_versions(db.session, [current_user.id])
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(items)} effects updated',
+            'results': [{'index': index, 'effect_id': item['id'], 'updated': True} for index, item in enumerate(items)]
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error updating effects: {str(e)}'}), 500
+
+@effects_bp.route('/effects/bulk', methods=['DELETE'])
+@query_budget(5)
+@token_required
+def bulk_delete_effects(current_user):
+    try:
+        data = request.get_json(silent=True)
+        effect_ids, message = _bulk_items(data, 'effect_ids')
+        if message:
+            return jsonify({'message': message}), 400
+        if not all(_is_effect_id(effect_id) for effect_id in effect_ids):
+            return jsonify({'message': 'effect_ids must be integers'}), 400
+        
+        effect_ids = list(dict.fromkeys(effect_ids))
+        owned = _owned_effect_ids(current_user.id, effect_ids)
+        missing = [{'effect_id': effect_id, 'message': 'Effect not found'}
+                   for effect_id in effect_ids if effect_id not in owned]
+        if missing:
+            return _validation_failed(missing)
+        
+        # Snapshots first, then the effects, in one transaction
+        analytics_snapshot_service.delete_effects(effect_ids)
+        db.session.execute(
+            delete(Effect).where(Effect.id.in_(effect_ids), Effect.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        )
+        bump_versions(db.session, [current_user.id])
+        db.session.commit()
+        for effect_id in effect_ids:
+            effect_house_service.invalidate_analytics(effect_id)
+        
+        return jsonify({
+            'message': f'{len(effect_ids)} effects deleted',
+            'results': [{'effect_id': effect_id, 'deleted': True} for effect_id in effect_ids]
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error deleting effects: {str(e)}'}), 500
+
 def publish_effect_background(effect_id, account_ids):
     """Background task for publishing effect to multiple accounts"""
     try:
         success, result = effect_house_service.bulk_publish_effect(effect_id, account_ids)
-        print(f"[Background Task] Effect {effect_id} publish result: {result}")
-    except Exception as e:
-        print(f"[Background Task] Error publishing effect {effect_id}: {str(e)}")
+        logger.info("Effect %s publish result: %s", effect_id, result)
+    except Exception:
+        logger.exception("Error publishing effect %s", effect_id)
 
 @effects_bp.route('/effects/<int:effect_id>/publish', methods=['POST'])
+@query_budget(4)
 @token_required
 def publish_effect(current_user, effect_id):
     try:
@@ -156,9 +369,10 @@ def get_effect_status(current_user, effect_id):
         # Check status using Effect House service
         status, message = effect_house_service.check_effect_status(effect_id)
         
-        # Update effect status in database
-        effect.status = status
-        db.session.commit()
+        # Write only a real change; a failed check leaves the stored status alone
+        if status != 'error' and status != effect.status:
+            effect.status = status
+            db.session.commit()
         
         return jsonify({
             'effect_id': effect_id,
@@ -170,6 +384,57 @@ def get_effect_status(current_user, effect_id):
     except Exception as e:
         return jsonify({'message': f'Error checking effect status: {str(e)}'}), 500
 
+@effects_bp.route('/effects/status', methods=['POST'])
+@query_budget(4)
+@token_required
+def get_effect_statuses(current_user):
+    try:
+        effect_ids, message = _bulk_items(request.get_json(silent=True), 'effect_ids')
+        if message:
+            return jsonify({'message': message}), 400
+        if not all(_is_effect_id(i) for i in effect_ids):
+            return jsonify({'message': 'effect_ids must be integers'}), 400
+        
+        # One IN (...) query for every requested effect the user owns
+        owned = {
+            effect.id: effect
+            for effect in Effect.query.filter(Effect.id.in_(effect_ids), Effect.user_id == current_user.id)
+        }
+        
+        results = []
+        updated = 0
+        for effect_id in dict.fromkeys(effect_ids):
+            effect = owned.get(effect_id)
+            if effect is None:
+                results.append({'effect_id': effect_id, 'success': False, 'message': 'Effect not found'})
+                continue
+            
+            status, message = effect_house_service.check_effect_status(effect_id)
+            changed = status != 'error' and status != effect.status
+            if changed:
+                effect.status = status
+                updated += 1
+            results.append({
+                'effect_id': effect_id,
+                'success': status != 'error',
+                'status': status,
+                'message': message,
+                'changed': changed
+            })
+        
+        # Changed rows only, flushed together in one transaction
+        if updated:
+            db.session.commit()
+        
+        return jsonify({
+            'results': results,
+            'updated': updated
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error checking effect statuses: {str(e)}'}), 500
+
 @effects_bp.route('/effects/<int:effect_id>/analytics', methods=['GET'])
 @token_required
 def get_effect_analytics(current_user, effect_id):
@@ -179,7 +444,7 @@ def get_effect_analytics(current_user, effect_id):
         if not effect:
             return jsonify({'message': 'Effect not found'}), 404
         
-        analytics = effect_house_service.get_effect_analytics(effect_id)
+        analytics = effect_house_service.cached_effect_analytics(effect_id)
         
         if analytics:
             return jsonify({
@@ -213,10 +478,13 @@ def resubmit_effect(current_user, effect_id):
         return jsonify({'message': f'Error resubmitting effect: {str(e)}'}), 500
 
 @effects_bp.route('/effect-house/earnings', methods=['GET'])
+@query_budget(3)
 @token_required
 def get_effect_house_earnings(current_user):
     try:
         date_range = request.args.get('date_range', '30d')
+        if date_range not in REPORT_WINDOWS:
+            return jsonify({'message': f"date_range must be one of: {', '.join(REPORT_WINDOWS)}"}), 400
         
         earnings_report = effect_house_service.generate_earnings_report(current_user.id, date_range)
         
@@ -229,6 +497,7 @@ def get_effect_house_earnings(current_user):
         return jsonify({'message': f'Error fetching earnings: {str(e)}'}), 500
 
 @effects_bp.route('/effect-house/bulk-operations', methods=['POST'])
+@query_budget(4)
 @token_required
 def bulk_operations(current_user):
     try:
@@ -241,34 +510,36 @@ def bulk_operations(current_user):
         
         results = []
         
+        # Load every requested effect the user owns with one IN (...) query
+        owned = {
+            effect.id: effect
+            for effect in Effect.query.filter(Effect.id.in_(effect_ids), Effect.user_id == current_user.id)
+        }
+        effects = [owned[effect_id] for effect_id in dict.fromkeys(effect_ids) if effect_id in owned]
+        
         if operation == 'bulk_publish':
             account_ids = data.get('account_ids', [])
             if not account_ids:
                 return jsonify({'message': 'No accounts selected for bulk publish'}), 400
             
-            for effect_id in effect_ids:
-                effect = Effect.query.filter_by(id=effect_id, user_id=current_user.id).first()
-                if effect:
-                    # Start background publishing
-                    thread = threading.Thread(target=publish_effect_background, args=(effect_id, account_ids))
-                    thread.daemon = True
-                    thread.start()
-                    
-                    results.append({
-                        'effect_id': effect_id,
-                        'status': 'publishing_started'
-                    })
+            for effect in effects:
+                # Start background publishing
+                thread = threading.Thread(target=publish_effect_background, args=(effect.id, account_ids))
+                thread.daemon = True
+                thread.start()
+                
+                results.append({
+                    'effect_id': effect.id,
+                    'status': 'publishing_started'
+                })
         
         elif operation == 'bulk_resubmit':
-            for effect_id in effect_ids:
-                effect = Effect.query.filter_by(id=effect_id, user_id=current_user.id).first()
-                if effect:
-                    success, message = effect_house_service.auto_resubmit_rejected(effect_id)
-                    results.append({
-                        'effect_id': effect_id,
-                        'success': success,
-                        'message': message
-                    })
+            for effect_id, success, message in effect_house_service.bulk_resubmit_rejected(effects):
+                results.append({
+                    'effect_id': effect_id,
+                    'success': success,
+                    'message': message
+                })
         
         return jsonify({
             'operation': operation,
@@ -0,0 +1,37 @@
+from flask import request
+from ..config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+class InvalidCursor(ValueError):
+    """Raised when the ?after= cursor is not a valid key"""
+
+def page_params():
+    """Read ?limit= and ?after= from the request, clamping limit to MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    after = request.args.get('after')
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            raise InvalidCursor(after)
+    return limit, after
+
+def paginate(query, key_column, serialize=lambda obj: obj.to_dict()):
+    """
+    Keyset pagination over key_column (a unique, increasing column such as the
+    primary key). Returns (items, next_cursor); next_cursor is None on the last page.
+    The query may return ORM objects or column rows (see models/projections.py)
+    as long as the rows expose key_column by name.
+    """
+    limit, after = page_params()
+    if after is not None:
+        query = query.filter(key_column > after)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = str(getattr(rows[-1], key_column.key)) if has_more else None
+    return [serialize(row) for row in rows], next_cursor
@@ -1,18 +1,31 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import undefer
 from ..models.user import db, TikTokAccount
+from ..models.projections import TIKTOK_ACCOUNT_LIST
 from .auth import token_required
+from .pagination import paginate, InvalidCursor
+from ..services.query_budget import query_budget
+from ..services.change_versions import versioned_etag
 import json
 
 tiktok_accounts_bp = Blueprint('tiktok_accounts', __name__)
 
 @tiktok_accounts_bp.route('/tiktok-accounts', methods=['GET'])
+@query_budget(3)
 @token_required
+@versioned_etag
 def get_tiktok_accounts(current_user):
     try:
-        accounts = TikTokAccount.query.filter_by(user_id=current_user.id).all()
+        accounts, next_cursor = paginate(
+            TIKTOK_ACCOUNT_LIST.query(TikTokAccount.user_id == current_user.id), TikTokAccount.id,
+            TIKTOK_ACCOUNT_LIST.to_dict
+        )
         return jsonify({
-            'accounts': [account.to_dict() for account in accounts]
+            'accounts': accounts,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'message': f'Error fetching TikTok accounts: {str(e)}'}), 500
 
@@ -91,7 +104,9 @@ def delete_tiktok_account(current_user, account_id):
 @token_required
 def test_tiktok_login(current_user, account_id):
     try:
-        account = TikTokAccount.query.filter_by(id=account_id, user_id=current_user.id).first()
+        account = TikTokAccount.query.options(undefer(TikTokAccount.cookies_data)).filter_by(
+            id=account_id, user_id=current_user.id
+        ).first()
         
         if not account:
             return jsonify({'message': 'TikTok account not found'}), 404
@@ -1,12 +1,20 @@
 from flask import Blueprint, jsonify, request
 from ..models.user import User, db
+from ..models.projections import USER_LIST
+from .auth import identity_cache
+from .pagination import paginate, InvalidCursor
+from ..services.query_budget import query_budget
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
+@query_budget(2)
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    try:
+        users, next_cursor = paginate(USER_LIST.query(), User.id, USER_LIST.to_dict)
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
+    return jsonify({'users': users, 'next_cursor': next_cursor})
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -29,6 +37,7 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    identity_cache.invalidate(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -36,4 +45,5 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate(user_id)
     return '', 204
@@ -0,0 +1,211 @@
+"""
+Daily Effect House analytics snapshots and the date-range earnings report.
+
+Ingesting calls the remote analytics API once per published effect, so it
+never runs inside a request: reports schedule a background ingest for the
+user and answer from the snapshots already stored. Run the CLI from cron to
+keep every user current:
+
+    python -m src.services.analytics_snapshot_service ingest [--user-id N]
+"""
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func, select
+from ..models.user import db, Effect, AnalyticsSnapshot
+from ..models.dialect import insert
+from ..config import ANALYTICS_SNAPSHOT_BACKFILL_DAYS, ANALYTICS_SNAPSHOT_BATCH_SIZE, ANALYTICS_SNAPSHOT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Report windows accepted by ?date_range=, in days
+REPORT_WINDOWS = {'7d': 7, '30d': 30, '90d': 90}
+
+class AnalyticsSnapshotService:
+    """
+    Appends one AnalyticsSnapshot row per published effect per complete UTC
+    day and answers earnings reports with a grouped query over them.
+    """
+
+    def __init__(self, fetch_daily, backfill_days=ANALYTICS_SNAPSHOT_BACKFILL_DAYS,
+                 batch_size=ANALYTICS_SNAPSHOT_BATCH_SIZE):
+        self.fetch_daily = fetch_daily
+        self.backfill_days = backfill_days
+        self.batch_size = batch_size
+        # user_id -> last day fully ingested for that user in this process
+        self._ingested_through = {}
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """Drop the ingest pool and locks; threads do not survive a fork"""
+        self._locks_lock = threading.Lock()
+        # One lock per user (None: all users), so ingests of different users never wait on each other
+        self._user_locks = {}
+        self._scheduled = set()
+        self._executor = None
+
+    def _user_lock(self, user_id):
+        with self._locks_lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def ingest(self, user_id=None, today=None):
+        """
+        Fetch and store the days after each published effect's latest snapshot,
+        up to yesterday. Only new days are requested; rows another worker
+        already wrote are skipped. Returns the number of rows inserted.
+        """
+        today = today or datetime.utcnow().date()
+        end = today - timedelta(days=1)
+        floor = today - timedelta(days=self.backfill_days)
+
+        with self._user_lock(user_id):
+            query = (
+                select(Effect.id, Effect.created_at, func.max(AnalyticsSnapshot.day))
+                .outerjoin(AnalyticsSnapshot, AnalyticsSnapshot.effect_id == Effect.id)
+                .where(Effect.status == 'published')
+                .group_by(Effect.id, Effect.created_at)
+            )
+            if user_id is not None:
+                query = query.where(Effect.user_id == user_id)
+            effects = db.session.execute(query).all()
+
+            inserted, rows, complete = 0, [], True
+            try:
+                for effect_id, created_at, last_day in effects:
+                    start = max(last_day + timedelta(days=1) if last_day else floor,
+                                created_at.date() if created_at else floor, floor)
+                    if start > end:
+                        continue
+                    days = self.fetch_daily(effect_id, start, end)
+                    if days is None:
+                        logger.warning("No daily analytics for effect %s", effect_id)
+                        complete = False
+                        continue
+                    rows.extend({'effect_id': effect_id, **day} for day in days)
+                    if len(rows) >= self.batch_size:
+                        inserted += self._write(rows)
+                        rows = []
+                inserted += self._write(rows)
+            except Exception:
+                db.session.rollback()
+                raise
+
+            if user_id is not None and complete:
+                self._ingested_through[user_id] = end
+            return inserted
+
+    def is_current(self, user_id, today=None):
+        """True when this process has ingested the user's effects up to yesterday"""
+        today = today or datetime.utcnow().date()
+        return self._ingested_through.get(user_id) == today - timedelta(days=1)
+
+    def schedule_ingest(self, user_id):
+        """
+        Start a background ingest of a user's effects unless they are current
+        or one is already queued. Returns True when the stored snapshots may
+        still be missing days.
+        """
+        if self.is_current(user_id):
+            return False
+        app = current_app._get_current_object()
+        with self._locks_lock:
+            if user_id in self._scheduled:
+                return True
+            self._scheduled.add(user_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=ANALYTICS_SNAPSHOT_WORKERS,
+                                                    thread_name_prefix='analytics-ingest')
+            executor = self._executor
+        executor.submit(self._background_ingest, app, user_id)
+        return True
+
+    def _background_ingest(self, app, user_id):
+        try:
+            with app.app_context():
+                self.ingest(user_id)
+        except Exception:
+            logger.exception("Analytics snapshot ingest failed for user %s", user_id)
+        finally:
+            with self._locks_lock:
+                self._scheduled.discard(user_id)
+
+    def _write(self, rows):
+        if not rows:
+            return 0
+        stmt = insert(AnalyticsSnapshot.__table__).on_conflict_do_nothing(index_elements=['effect_id', 'day'])
+        inserted = db.session.execute(stmt, rows).rowcount
+        db.session.commit()
+        # Some drivers report -1 for executemany
+        return inserted if inserted >= 0 else len(rows)
+
+    def report(self, user_id, date_range='30d', today=None):
+        """
+        Earnings per published effect over the last `date_range` complete days,
+        from one grouped query over the snapshots.
+        """
+        if date_range not in REPORT_WINDOWS:
+            raise ValueError(f'Unknown date_range: {date_range}')
+        today = today or datetime.utcnow().date()
+        start = today - timedelta(days=REPORT_WINDOWS[date_range])
+
+        views = func.coalesce(func.sum(AnalyticsSnapshot.views), 0)
+        uses = func.coalesce(func.sum(AnalyticsSnapshot.uses), 0)
+        earnings = func.coalesce(func.sum(AnalyticsSnapshot.earnings), 0)
+        rows = db.session.execute(
+            select(Effect.id, Effect.effect_name, Effect.category, views, uses, earnings)
+            .outerjoin(AnalyticsSnapshot, and_(
+                AnalyticsSnapshot.effect_id == Effect.id,
+                AnalyticsSnapshot.day >= start,
+                AnalyticsSnapshot.day < today
+            ))
+            .where(Effect.user_id == user_id, Effect.status == 'published')
+            .group_by(Effect.id, Effect.effect_name, Effect.category)
+            .order_by(Effect.id)
+        ).all()
+
+        effects_data = [
+            {
+                'effect_id': row[0],
+                'effect_name': row[1],
+                'category': row[2],
+                'views': int(row[3]),
+                'uses': int(row[4]),
+                'earnings': round(float(row[5]), 2),
+                'cpm': round(float(row[5]) / row[3] * 1000 if row[3] else 0, 4)
+            }
+            for row in rows
+        ]
+        return {
+            'start': start.isoformat(),
+            'end': (today - timedelta(days=1)).isoformat(),
+            'effects_data': effects_data
+        }
+
+    def delete_effect(self, effect_id):
+        """Remove an effect's snapshots (used before the effect itself is deleted)"""
+        self.delete_effects([effect_id])
+
+    def delete_effects(self, effect_ids):
+        db.session.execute(AnalyticsSnapshot.__table__.delete().where(AnalyticsSnapshot.effect_id.in_(effect_ids)))
+
+def _fetch_daily(effect_id, start, end):
+    from .effect_house_service import effect_house_service
+    return effect_house_service.get_daily_analytics(effect_id, start, end)
+
+# Global service instance
+analytics_snapshot_service = AnalyticsSnapshotService(_fetch_daily)
+
+if __name__ == '__main__':
+    import argparse
+    from ..main import app
+
+    parser = argparse.ArgumentParser(description='Daily Effect House analytics snapshots')
+    parser.add_argument('command', choices=['ingest'])
+    parser.add_argument('--user-id', type=int, help='only this user\'s effects')
+    args = parser.parse_args()
+
+    with app.app_context():
+        sys.stdout.write(f"Inserted {analytics_snapshot_service.ingest(args.user_id)} analytics snapshot rows\n")
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL and LRU eviction
+    once `maxsize` entries are stored. With `stale_ttl` expired entries are
+    kept that much longer for stale-while-revalidate reads (see lookup()).
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, stale_ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        value, state = self.lookup(key)
+        return value if state == 'fresh' else default
+
+    def lookup(self, key):
+        """
+        Return (value, state) where state is 'fresh', 'stale' or 'miss'.
+        Entries stay readable as 'stale' for `stale_ttl` seconds after they
+        expire so callers can serve them while refreshing in the background.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, 'miss'
+
+            value, expires_at = entry
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    del self._data[key]
+                    self.misses += 1
+                    return None, 'miss'
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                return value, 'stale'
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, 'fresh'
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups * 100, 2) if lookups else 0
+            }
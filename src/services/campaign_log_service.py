@@ -0,0 +1,189 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from ..models.user import db, Campaign, CampaignLog
+from .campaign_rollup_service import campaign_rollup_service
+from ..config import (
+    CAMPAIGN_LOG_RETENTION_DAYS, CAMPAIGN_LOG_ARCHIVE_DIR, CAMPAIGN_LOG_PURGE_BATCH, CAMPAIGN_LOG_EXPORT_CHUNK
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns written for each archived or exported log row
+LOG_COLUMNS = (
+    CampaignLog.id,
+    CampaignLog.campaign_id,
+    CampaignLog.action_type,
+    CampaignLog.target_url,
+    CampaignLog.device_type,
+    CampaignLog.country,
+    CampaignLog.success,
+    CampaignLog.timestamp
+)
+
+def log_row_to_dict(row):
+    """Serialise a LOG_COLUMNS row the way CampaignLog.to_dict() does, plus campaign_id"""
+    data = dict(row._mapping)
+    data['timestamp'] = row.timestamp.isoformat() if row.timestamp else None
+    return data
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+class CampaignLogService:
+    """
+    Streaming export and retention for CampaignLog. Expired rows are archived
+    to gzipped NDJSON and then removed with set-based DELETEs in bounded batches.
+    """
+
+    def __init__(self, retention_days=CAMPAIGN_LOG_RETENTION_DAYS, archive_dir=CAMPAIGN_LOG_ARCHIVE_DIR,
+                 batch_size=CAMPAIGN_LOG_PURGE_BATCH):
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+
+    def iter_logs(self, campaign_id, start=None, end=None, chunk_size=CAMPAIGN_LOG_EXPORT_CHUNK):
+        """
+        Yield a campaign's logs as lists of at most chunk_size LOG_COLUMNS rows,
+        oldest first, read through a server-side cursor (yield_per).
+        """
+        conditions = [CampaignLog.campaign_id == campaign_id]
+        if start is not None:
+            conditions.append(CampaignLog.timestamp >= start)
+        if end is not None:
+            conditions.append(CampaignLog.timestamp < end)
+
+        result = db.session.execute(
+            select(*LOG_COLUMNS).where(*conditions)
+            .order_by(CampaignLog.timestamp, CampaignLog.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        try:
+            for rows in result.partitions():
+                yield rows
+        finally:
+            result.close()
+
+    def export(self, campaign_id, fmt='ndjson', start=None, end=None, compress=False):
+        """
+        Generate the encoded export one chunk at a time, gzip-compressed on the
+        fly when compress is set. Memory use does not depend on the log count.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f'Unknown export format: {fmt}')
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=[column.key for column in LOG_COLUMNS]) if fmt == 'csv' else None
+
+        def drain():
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return compressor.compress(data) if compressor else data
+
+        if writer:
+            writer.writeheader()
+        for rows in self.iter_logs(campaign_id, start, end):
+            for row in rows:
+                if writer:
+                    writer.writerow(log_row_to_dict(row))
+                else:
+                    buffer.write(json.dumps(log_row_to_dict(row)) + '\n')
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+        chunk = drain()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+
+    def apply_retention(self, retention_days=None, archive=True):
+        """
+        Archive and purge logs older than the retention cutoff, campaign by
+        campaign. Returns {campaign_id: purged_rows} for campaigns that had any.
+        """
+        days = self.retention_days if retention_days is None else retention_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+
+        # Expired rows must be counted in the rollups before they disappear
+        campaign_rollup_service.refresh()
+
+        purged = {}
+        campaign_ids = db.session.execute(select(Campaign.id).order_by(Campaign.id)).scalars().all()
+        for campaign_id in campaign_ids:
+            count = self.purge_campaign_logs(campaign_id, before=cutoff, archive=archive)
+            if count:
+                purged[campaign_id] = count
+        return purged
+
+    def purge_campaign_logs(self, campaign_id, before=None, archive=True, commit=True):
+        """
+        Delete a campaign's logs (only those older than `before` when given),
+        one batch per transaction. With commit=False the batches stay in the
+        caller's transaction, which commits or rolls back the whole purge.
+        Returns the number of rows deleted.
+        """
+        conditions = [CampaignLog.campaign_id == campaign_id]
+        if before is not None:
+            conditions.append(CampaignLog.timestamp < before)
+
+        archive_path = self._archive_path(campaign_id) if archive else None
+        deleted = 0
+        try:
+            while True:
+                rows = db.session.execute(
+                    select(*LOG_COLUMNS).where(*conditions).order_by(CampaignLog.id).limit(self.batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                # Write the batch out before deleting it; a crash in between
+                # leaves duplicates in the archive rather than losing rows.
+                if archive_path:
+                    self._append_archive(archive_path, rows)
+
+                result = db.session.execute(
+                    delete(CampaignLog).where(*conditions, CampaignLog.id <= rows[-1].id)
+                    .execution_options(synchronize_session=False)
+                )
+                if commit:
+                    db.session.commit()
+                deleted += result.rowcount
+        except Exception:
+            db.session.rollback()
+            raise
+        return deleted
+
+    def _archive_path(self, campaign_id):
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        return self.archive_dir / f'campaign_{campaign_id}' / f'campaign_{campaign_id}_{stamp}.ndjson.gz'
+
+    def _append_archive(self, path, rows):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            for row in rows:
+                archive.write(json.dumps(log_row_to_dict(row)) + '\n')
+
+# Global service instance
+campaign_log_service = CampaignLogService()
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from ..main import app
+
+    parser = argparse.ArgumentParser(description='Archive and purge expired CampaignLog rows')
+    parser.add_argument('--days', type=int, default=CAMPAIGN_LOG_RETENTION_DAYS, help='retention in days')
+    parser.add_argument('--no-archive', action='store_true', help='delete without writing archive files')
+    args = parser.parse_args()
+
+    with app.app_context():
+        purged = campaign_log_service.apply_retention(args.days, archive=not args.no_archive)
+        sys.stdout.write(f"Purged {sum(purged.values())} logs from {len(purged)} campaigns\n")
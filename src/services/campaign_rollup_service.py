@@ -0,0 +1,267 @@
+"""
+CampaignLog rollups for the campaign report.
+
+Reports never fold logs themselves: they schedule a background refresh and
+read the rollups plus the logs above the watermark. Run the refresh from
+cron as well so that tail stays small:
+
+    python -m src.services.campaign_rollup_service refresh
+"""
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, union_all, update
+from ..models.user import db, CampaignLog, CampaignLogRollup, RollupWatermark
+from ..models.dialect import insert, time_bucket, bucket_value
+from ..config import ROLLUP_BATCH_SIZE, ROLLUP_REFRESH_INTERVAL, ROLLUP_SETTLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+BUCKET_STEPS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+def _bucket_ceil(granularity, value):
+    """Start of the first bucket that begins at or after value"""
+    floor = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        floor = floor.replace(hour=0)
+    return floor if floor == value else floor + BUCKET_STEPS[granularity]
+
+class CampaignRollupService:
+    """
+    Keeps CampaignLogRollup up to date from CampaignLog and answers reporting
+    queries from the rollups instead of scanning raw logs.
+
+    The watermark is an id cursor, but ids are not handed out in commit order:
+    a transaction holding a lower id can commit after a higher one is already
+    visible. Only logs older than settle_seconds are folded, and a batch stops
+    before the first visible log that is still inside that window, so a late
+    commit is never passed over as long as no log-writing transaction runs
+    longer than settle_seconds.
+    """
+
+    WATERMARK = 'campaign_log_rollup'
+    GRANULARITIES = ('hour', 'day')
+    DIMENSIONS = ('country', 'device_type', 'success')
+
+    def __init__(self, batch_size=ROLLUP_BATCH_SIZE, refresh_interval=ROLLUP_REFRESH_INTERVAL,
+                 settle_seconds=ROLLUP_SETTLE_SECONDS):
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.settle_seconds = settle_seconds
+        self._lock = threading.Lock()
+        self._last_refresh = 0
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """Drop the refresh thread pool; threads do not survive a fork"""
+        self._schedule_lock = threading.Lock()
+        self._scheduled = False
+        self._executor = None
+
+    def refresh(self):
+        """
+        Fold CampaignLog rows above the watermark into the rollups, one batch
+        per transaction. Returns the number of log rows processed.
+        """
+        with self._lock:
+            processed = 0
+            while True:
+                count = self._refresh_batch()
+                if not count:
+                    break
+                processed += count
+            self._last_refresh = time.monotonic()
+            return processed
+
+    def schedule_refresh(self):
+        """
+        Start a background refresh unless one is queued or another refresh
+        ran within refresh_interval seconds.
+        """
+        if time.monotonic() - self._last_refresh < self.refresh_interval:
+            return False
+        app = current_app._get_current_object()
+        with self._schedule_lock:
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='campaign-rollup')
+            executor = self._executor
+        executor.submit(self._background_refresh, app)
+        return True
+
+    def _background_refresh(self, app):
+        try:
+            with app.app_context():
+                self.refresh()
+        except Exception:
+            logger.exception("CampaignLog rollup refresh failed")
+        finally:
+            with self._schedule_lock:
+                self._scheduled = False
+
+    def _refresh_batch(self):
+        try:
+            watermark = db.session.get(RollupWatermark, self.WATERMARK)
+            last_id = watermark.last_id if watermark else 0
+
+            # Stop before the first log that may still have uncommitted neighbours
+            cutoff = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+            unsettled_id = db.session.execute(
+                select(func.min(CampaignLog.id)).where(CampaignLog.id > last_id, CampaignLog.timestamp >= cutoff)
+            ).scalar()
+            pending = select(CampaignLog.id).where(CampaignLog.id > last_id)
+            if unsettled_id is not None:
+                pending = pending.where(CampaignLog.id < unsettled_id)
+            batch_ids = pending.order_by(CampaignLog.id).limit(self.batch_size).subquery()
+            upper_id, count = db.session.execute(select(func.max(batch_ids.c.id), func.count(batch_ids.c.id))).one()
+            if not count:
+                db.session.rollback()
+                return 0
+
+            for granularity in self.GRANULARITIES:
+                self._fold(granularity, last_id, upper_id)
+
+            # Advance the watermark only from the value this batch started at,
+            # so a concurrent refresh in another worker cannot double count.
+            if watermark is None:
+                advanced = db.session.execute(
+                    insert(RollupWatermark.__table__).values(name=self.WATERMARK, last_id=upper_id).on_conflict_do_nothing()
+                ).rowcount
+            else:
+                advanced = db.session.execute(
+                    update(RollupWatermark)
+                    .where(RollupWatermark.name == self.WATERMARK, RollupWatermark.last_id == last_id)
+                    .values(last_id=upper_id)
+                ).rowcount
+
+            if advanced != 1:
+                db.session.rollback()
+                return 0
+
+            db.session.commit()
+            return count
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _fold(self, granularity, last_id, upper_id):
+        bucket = time_bucket(granularity, CampaignLog.timestamp)
+        country = func.coalesce(CampaignLog.country, '')
+        device_type = func.coalesce(CampaignLog.device_type, '')
+        success = func.coalesce(CampaignLog.success, False)
+
+        groups = db.session.execute(
+            select(bucket, CampaignLog.campaign_id, country, device_type, success, func.count())
+            .where(CampaignLog.id > last_id, CampaignLog.id <= upper_id, CampaignLog.timestamp.isnot(None))
+            .group_by(bucket, CampaignLog.campaign_id, country, device_type, success)
+        ).all()
+        if not groups:
+            return
+
+        rows = [
+            {
+                'granularity': granularity,
+                'bucket_start': bucket_value(row[0]),
+                'campaign_id': row[1],
+                'country': row[2],
+                'device_type': row[3],
+                'success': bool(row[4]),
+                'actions': row[5]
+            }
+            for row in groups
+        ]
+        stmt = insert(CampaignLogRollup.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'campaign_id', 'country', 'device_type', 'success'],
+            set_={'actions': CampaignLogRollup.__table__.c.actions + stmt.excluded.actions}
+        )
+        db.session.execute(stmt, rows)
+
+    def query(self, campaign_id, start, end, granularity='day', group_by=()):
+        """
+        Action counts per bucket for buckets starting in [start, end), split by
+        the requested dimensions ('country', 'device_type', 'success').
+
+        Rollups cover the logs up to the watermark; logs above it are counted
+        from CampaignLog in the same statement, so the report is complete
+        without waiting for a refresh.
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity}')
+        unknown = set(group_by) - set(self.DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown group_by dimension: {', '.join(sorted(unknown))}")
+
+        columns = [getattr(CampaignLogRollup, name) for name in group_by]
+        rolled = (
+            select(CampaignLogRollup.bucket_start, *columns, func.sum(CampaignLogRollup.actions))
+            .where(
+                CampaignLogRollup.campaign_id == campaign_id,
+                CampaignLogRollup.granularity == granularity,
+                CampaignLogRollup.bucket_start >= start,
+                CampaignLogRollup.bucket_start < end
+            )
+            .group_by(CampaignLogRollup.bucket_start, *columns)
+        )
+
+        watermark = (
+            select(func.coalesce(func.max(RollupWatermark.last_id), 0))
+            .where(RollupWatermark.name == self.WATERMARK)
+            .scalar_subquery()
+        )
+        bucket = time_bucket(granularity, CampaignLog.timestamp)
+        dimensions = {
+            'country': func.coalesce(CampaignLog.country, ''),
+            'device_type': func.coalesce(CampaignLog.device_type, ''),
+            'success': func.coalesce(CampaignLog.success, False)
+        }
+        tail_columns = [dimensions[name] for name in group_by]
+        # Logs whose bucket starts in [start, end), as a range on the timestamp index
+        tail = (
+            select(bucket, *tail_columns, func.count())
+            .where(
+                CampaignLog.campaign_id == campaign_id,
+                CampaignLog.id > watermark,
+                CampaignLog.timestamp >= _bucket_ceil(granularity, start),
+                CampaignLog.timestamp < _bucket_ceil(granularity, end)
+            )
+            .group_by(bucket, *tail_columns)
+        )
+
+        totals = {}
+        for row in db.session.execute(union_all(rolled, tail)):
+            key = (bucket_value(row[0]), *(bool(value) if name == 'success' else value
+                                           for name, value in zip(group_by, row[1:-1])))
+            totals[key] = totals.get(key, 0) + int(row[-1])
+
+        buckets = []
+        for key in sorted(totals):
+            bucket_row = {'bucket_start': key[0].isoformat()}
+            bucket_row.update(zip(group_by, key[1:]))
+            bucket_row['actions'] = totals[key]
+            buckets.append(bucket_row)
+        return buckets
+
+    def delete_campaign(self, campaign_id):
+        """Remove all rollup rows of a campaign (used when the campaign is deleted)"""
+        db.session.execute(CampaignLogRollup.__table__.delete().where(CampaignLogRollup.campaign_id == campaign_id))
+
+# Global service instance
+campaign_rollup_service = CampaignRollupService()
+
+if __name__ == '__main__':
+    import argparse
+    from ..main import app
+
+    parser = argparse.ArgumentParser(description='Fold settled CampaignLog rows into the report rollups')
+    parser.add_argument('command', choices=['refresh'])
+    args = parser.parse_args()
+
+    with app.app_context():
+        sys.stdout.write(f"Folded {campaign_rollup_service.refresh()} campaign logs into the rollups\n")
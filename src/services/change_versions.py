@@ -0,0 +1,89 @@
+"""
+Per-user change versions for conditional GETs on the polled list endpoints.
+
+Every flush that inserts, updates or deletes a user's effects, campaigns or
+TikTok accounts bumps that user's row in UserChangeVersion inside the same
+transaction, so the version only moves when the change commits. List views
+decorated with @versioned_etag read the version (one primary-key lookup)
+before anything else and answer a matching If-None-Match with 304 without
+touching the list tables.
+
+Writes that bypass the ORM unit of work (Core insert/update/delete on these
+tables) must call bump_versions() themselves.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from sqlalchemy import event, select
+from ..models.user import db, Effect, Campaign, TikTokAccount, UserChangeVersion
+from ..models.dialect import insert
+
+VERSIONED_MODELS = (Effect, Campaign, TikTokAccount)
+
+def bump_versions(session, user_ids):
+    """Increment the change version of each user in the session's transaction"""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+    table = UserChangeVersion.__table__
+    stmt = insert(table).on_conflict_do_update(index_elements=[table.c.user_id], set_={'version': table.c.version + 1})
+    # Sorted ids keep concurrent bumps from deadlocking on PostgreSQL
+    session.connection().execute(stmt, [{'user_id': user_id, 'version': 1} for user_id in user_ids])
+
+def current_version(user_id):
+    return db.session.execute(
+        select(UserChangeVersion.version).where(UserChangeVersion.user_id == user_id)
+    ).scalar() or 0
+
+def _before_flush(session, flush_context, instances):
+    # Persistent rows are read now, while lazy loads are still safe; new rows
+    # may only get their user_id during the flush, so keep the objects.
+    changed = session.info['changed_user_ids'] = set()
+    pending = session.info['pending_versioned'] = []
+    for obj in session.new:
+        if isinstance(obj, VERSIONED_MODELS):
+            pending.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, VERSIONED_MODELS):
+            changed.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj, include_collections=False):
+            changed.add(obj.user_id)
+
+def _after_flush(session, flush_context):
+    changed = session.info.pop('changed_user_ids', set())
+    changed.update(obj.user_id for obj in session.info.pop('pending_versioned', []))
+    bump_versions(session, changed)
+
+def list_etag(user_id, version):
+    """ETag for the current request's list response at a given change version"""
+    args = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    key = f'{user_id}:{version}:{request.path}?{args}'
+    return hashlib.blake2b(key.encode(), digest_size=10).hexdigest()
+
+def versioned_etag(view):
+    """
+    Tag a list view's 200 responses with the user's change version and answer
+    a matching If-None-Match with 304. Goes below @token_required.
+    """
+    @wraps(view)
+    def decorated(current_user, *args, **kwargs):
+        # Read the version before the rows: a write landing in between makes
+        # the next poll miss instead of caching new rows under an old tag
+        etag = list_etag(current_user.id, current_version(current_user.id))
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.make_response(view(current_user, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+        # Weak: the tag names the data, not the bytes (which vary by encoding)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated
+
+def init_app(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
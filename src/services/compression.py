@@ -0,0 +1,51 @@
+"""
+gzip/brotli compression of API responses, negotiated from Accept-Encoding.
+
+Only buffered responses of a compressible mimetype and at least
+COMPRESS_MIN_SIZE bytes are compressed. Streamed responses (log exports) and
+files served by send_file or already encoded (precompressed static assets)
+pass through untouched. Brotli is used when the optional brotli package is
+installed and the client prefers it.
+"""
+import gzip
+from flask import request
+from ..config import COMPRESS_MIN_SIZE, COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY, COMPRESS_MIMETYPES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Server preference when the client accepts several encodings equally
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(data, encoding, gzip_level=COMPRESS_GZIP_LEVEL, brotli_quality=COMPRESS_BROTLI_QUALITY):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+def _compress_response(response):
+    if response.mimetype not in COMPRESS_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)):
+        return response
+
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The body differs per encoding; a weak ETag still matches If-None-Match
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_app(app):
+    app.after_request(_compress_response)
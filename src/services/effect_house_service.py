@@ -1,9 +1,18 @@
-import requests
 import json
+import logging
+import threading
 import time
 import random
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import undefer
 from ..models.user import db, Effect, TikTokAccount
+from .cache import TTLCache
+from .analytics_snapshot_service import analytics_snapshot_service
+from ..config import ANALYTICS_CACHE_TTL, ANALYTICS_CACHE_STALE_TTL, ANALYTICS_CACHE_SIZE, ANALYTICS_REFRESH_WORKERS
+
+logger = logging.getLogger(__name__)
 
 class EffectHouseService:
     """
@@ -12,7 +21,20 @@ class EffectHouseService:
     
     def __init__(self):
         self.base_url = "https://effecthouse.tiktok.com"
-        self.session = requests.Session()
+        self._session = None
+        self.analytics_cache = TTLCache(maxsize=ANALYTICS_CACHE_SIZE, ttl=ANALYTICS_CACHE_TTL,
+                                        stale_ttl=ANALYTICS_CACHE_STALE_TTL)
+        self._reset_refresh_state()
+    
+    @property
+    def session(self):
+        """
+        HTTP session, created on first use so importing the app stays cheap
+        """
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
     
     def login_with_cookies(self, cookies_data):
         """
@@ -74,7 +96,7 @@ class EffectHouseService:
             ]
             
             for step in steps:
-                print(f"[Effect Upload] {step}")
+                logger.info("[Effect Upload] %s", step)
                 time.sleep(random.uniform(1, 3))  # Simulate processing time
             
             # Simulate success/failure (90% success rate)
@@ -130,6 +152,79 @@ class EffectHouseService:
             
         except Exception as e:
             return None
+
+    def get_daily_analytics(self, effect_id, start, end):
+        """
+        Ambil analytics efek per hari untuk hari start..end (inklusif)
+        """
+        try:
+            # Simulate one remote call returning a row per day
+            days = []
+            day = start
+            while day <= end:
+                views = random.randint(10, 2000)
+                uses = random.randint(5, views // 2)
+                days.append({
+                    'day': day,
+                    'views': views,
+                    'uses': uses,
+                    'earnings': round(uses * random.uniform(0.001, 0.01), 4)
+                })
+                day += timedelta(days=1)
+            return days
+
+        except Exception:
+            return None
+
+    def cached_effect_analytics(self, effect_id):
+        """
+        Analytics from the cache. A stale entry is returned while one background
+        refresh replaces it; a miss is fetched now.
+        """
+        analytics, state = self.analytics_cache.lookup(effect_id)
+        if state == 'stale':
+            self._schedule_refresh(effect_id)
+        elif state == 'miss':
+            analytics = self._refresh_analytics(effect_id)
+        return analytics
+
+    def invalidate_analytics(self, effect_id):
+        self.analytics_cache.invalidate(effect_id)
+
+    def reset_after_fork(self):
+        """Drop the refresh pool; its threads do not survive a fork"""
+        self._reset_refresh_state()
+
+    def _reset_refresh_state(self):
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = None
+        self._refreshing = set()
+
+    def _refresh_analytics(self, effect_id):
+        analytics = self.get_effect_analytics(effect_id)
+        if analytics is not None:
+            self.analytics_cache.set(effect_id, analytics)
+        return analytics
+
+    def _schedule_refresh(self, effect_id):
+        with self._refresh_lock:
+            if effect_id in self._refreshing:
+                return
+            self._refreshing.add(effect_id)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=ANALYTICS_REFRESH_WORKERS,
+                                                            thread_name_prefix='analytics-refresh')
+            executor = self._refresh_executor
+        executor.submit(self._background_refresh, effect_id)
+
+    def _background_refresh(self, effect_id):
+        try:
+            self._refresh_analytics(effect_id)
+        except Exception:
+            logger.exception("Analytics refresh failed for effect %s", effect_id)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(effect_id)
     
     def bulk_publish_effect(self, effect_id, account_ids):
         """
@@ -148,8 +243,16 @@ class EffectHouseService:
         success_count = 0
         total_accounts = len(account_ids)
         
+        # One IN (...) query for all accounts instead of one lookup per id
+        accounts = {
+            account.id: account
+            for account in TikTokAccount.query.options(undefer(TikTokAccount.cookies_data)).filter(
+                TikTokAccount.id.in_(account_ids)
+            )
+        }
+        
         for account_id in account_ids:
-            account = TikTokAccount.query.get(account_id)
+            account = accounts.get(account_id)
             if not account:
                 results.append({
                     'account_id': account_id,
@@ -210,68 +313,85 @@ class EffectHouseService:
             if not effect:
                 return False, "Efek tidak ditemukan"
             
-            # Check current status
-            status, message = self.check_effect_status(effect_id)
-            
-            if status == 'rejected' or status == 'needs_revision':
-                # Simulate auto-revision process
-                print(f"[Auto Resubmit] Melakukan revisi otomatis untuk efek: {effect.effect_name}")
-                
-                # Simulate revision steps
-                revision_steps = [
-                    "Menganalisis alasan penolakan...",
-                    "Melakukan perbaikan otomatis...",
-                    "Mengoptimalkan metadata...",
-                    "Mengirim ulang untuk review..."
-                ]
-                
-                for step in revision_steps:
-                    print(f"[Auto Resubmit] {step}")
-                    time.sleep(random.uniform(1, 2))
-                
-                # Update effect status
-                effect.status = 'pending'
+            success, message = self._resubmit(effect)
+            if success:
                 db.session.commit()
-                
-                return True, "Efek berhasil disubmit ulang setelah revisi"
-            else:
-                return False, f"Efek tidak perlu resubmit (status: {status})"
+            return success, message
                 
         except Exception as e:
             return False, f"Error saat auto resubmit: {str(e)}"
     
-    def generate_earnings_report(self, user_id, date_range='30d'):
+    def bulk_resubmit_rejected(self, effects):
         """
-        Generate laporan pendapatan dari semua efek user
+        Submit ulang beberapa efek yang sudah dimuat, dengan satu commit di akhir.
+        Returns a list of (effect_id, success, message).
         """
+        effects = list(effects)
+        effect_ids = [effect.id for effect in effects]
+        results = []
         try:
-            effects = Effect.query.filter_by(user_id=user_id).all()
+            for effect in effects:
+                success, message = self._resubmit(effect)
+                results.append((effect.id, success, message))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            results = [(effect_id, False, f"Error saat auto resubmit: {str(e)}") for effect_id in effect_ids]
+        return results
+    
+    def _resubmit(self, effect):
+        """Revisi dan set status pending bila perlu; caller yang commit"""
+        # Check current status
+        status, message = self.check_effect_status(effect.id)
+        
+        if status == 'rejected' or status == 'needs_revision':
+            # Simulate auto-revision process
+            logger.info("[Auto Resubmit] Melakukan revisi otomatis untuk efek: %s", effect.effect_name)
             
-            total_earnings = 0
-            effects_data = []
+            # Simulate revision steps
+            revision_steps = [
+                "Menganalisis alasan penolakan...",
+                "Melakukan perbaikan otomatis...",
+                "Mengoptimalkan metadata...",
+                "Mengirim ulang untuk review..."
+            ]
             
-            for effect in effects:
-                if effect.status == 'published':
-                    analytics = self.get_effect_analytics(effect.id)
-                    if analytics:
-                        total_earnings += analytics['earnings']
-                        effects_data.append({
-                            'effect_id': effect.id,
-                            'effect_name': effect.effect_name,
-                            'category': effect.category,
-                            'views': analytics['views'],
-                            'uses': analytics['uses'],
-                            'earnings': analytics['earnings'],
-                            'cpm': analytics['cpm']
-                        })
+            for step in revision_steps:
+                logger.info("[Auto Resubmit] %s", step)
+                time.sleep(random.uniform(1, 2))
             
+            # Update effect status
+            effect.status = 'pending'
+            
+            return True, "Efek berhasil disubmit ulang setelah revisi"
+        else:
+            return False, f"Efek tidak perlu resubmit (status: {status})"
+    
+    def generate_earnings_report(self, user_id, date_range='30d'):
+        """
+        Generate laporan pendapatan dari semua efek user
+        """
+        try:
+            # New complete days are fetched in the background once per user per
+            # day; the report is one grouped query over the stored snapshots
+            ingest_pending = analytics_snapshot_service.schedule_ingest(user_id)
+            report = analytics_snapshot_service.report(user_id, date_range)
+            effects_data = report['effects_data']
+            status_counts = dict(db.session.execute(
+                select(Effect.status, func.count()).where(Effect.user_id == user_id).group_by(Effect.status)
+            ).all())
+
+            total_earnings = sum(effect['earnings'] for effect in effects_data)
             return {
                 'total_earnings': round(total_earnings, 2),
-                'total_effects': len(effects),
-                'published_effects': len([e for e in effects if e.status == 'published']),
+                'total_effects': sum(status_counts.values()),
+                'published_effects': status_counts.get('published', 0),
                 'average_earnings_per_effect': round(total_earnings / len(effects_data) if effects_data else 0, 2),
                 'effects_data': effects_data,
                 'date_range': date_range,
+                'start': report['start'],
+                'end': report['end'],
+                'ingest_pending': ingest_pending,
                 'generated_at': datetime.utcnow().isoformat()
             }
             
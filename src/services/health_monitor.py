@@ -0,0 +1,94 @@
+"""
+Database health probe run by a background thread.
+
+/health and /ready read the last probe result instead of opening a pooled
+connection for every platform probe or uptime monitor hit. Each process runs
+its own thread, started on first use (threads do not survive gunicorn's fork).
+"""
+import logging
+import os
+import threading
+import time
+from sqlalchemy import text
+from ..config import HEALTH_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    def __init__(self, interval):
+        self.interval = interval
+        self.engine = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+        self._result = None
+
+    def init_app(self, engine):
+        self.engine = engine
+
+    def ensure_started(self):
+        if self._pid == os.getpid() or self.engine is None:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._stop = threading.Event()
+                thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+                thread.start()
+                self._pid = os.getpid()
+
+    def reset(self):
+        """Forget the result and thread inherited from the preloading master"""
+        self._pid = None
+        self._result = None
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        stop = self._stop
+        while True:
+            self.probe()
+            if stop.wait(self.interval):
+                return
+
+    def probe(self):
+        started = time.perf_counter()
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            error = None
+        except Exception as e:
+            error = str(e)
+
+        previous = self._result
+        if error and (previous is None or previous['error'] is None):
+            logger.warning("Database health probe failed: %s", error)
+        elif not error and previous is not None and previous['error']:
+            logger.info("Database health probe recovered")
+        self._result = {
+            'error': error,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+            'checked_at': time.time(),
+        }
+
+    def snapshot(self):
+        """Last probe result with its age; 'unknown' until the first probe finishes"""
+        self.ensure_started()
+        result = self._result
+        if result is None:
+            return {'database': 'unknown', 'checked': False}
+        age = time.time() - result['checked_at']
+        snapshot = {
+            'database': 'disconnected' if result['error'] else 'connected',
+            'checked': True,
+            'age_seconds': round(age, 3),
+            'latency_ms': result['latency_ms'],
+            # The thread is stuck (e.g. a hanging connect) or no longer running
+            'stale': age > 3 * self.interval,
+        }
+        if result['error']:
+            snapshot['warning'] = result['error']
+        return snapshot
+
+# Global monitor instance
+health_monitor = HealthMonitor(HEALTH_CHECK_INTERVAL)
@@ -0,0 +1,175 @@
+"""
+Structured JSON logging that never blocks a request on stdout.
+
+Records go through a bounded in-memory queue and are written by a background
+QueueListener thread; when the queue is full a record is dropped and counted
+rather than making the caller wait. Each record carries the request id
+(X-Request-ID, generated when the client sends none). Chatty loggers can be
+sampled with LOG_SAMPLE_RATES; warnings and errors are never sampled out.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from ..config import LOG_LEVEL, LOG_FORMAT, LOG_ASYNC, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class ContextFilter(logging.Filter):
+    """
+    Attach the request id and apply per-logger sampling. Runs in the calling
+    thread, before the record is queued, so the request context is available.
+    """
+
+    def __init__(self, sample_rates):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self._rates = {}
+
+    def rate_for(self, name):
+        rate = self._rates.get(name)
+        if rate is None:
+            # Longest matching logger prefix wins, like logger levels
+            prefix = name
+            while prefix not in self.sample_rates and '.' in prefix:
+                prefix = prefix.rsplit('.', 1)[0]
+            rate = self._rates[name] = self.sample_rates.get(prefix, 1.0)
+        return rate
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            rate = self.rate_for(record.name)
+            if rate < 1.0 and random.random() >= rate:
+                return False
+        record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Keep exc_info and extras for the JSON formatter; only merge the args
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def parse_sample_rates(value):
+    """'logger.name=0.01,other=0.5' -> {'logger.name': 0.01, 'other': 0.5}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+class LoggingPipeline:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.handler = None
+        self.listener = None
+        self.output = None
+
+    def configure(self):
+        """Install the handler on the root logger once per process"""
+        with self._lock:
+            if self.handler is not None:
+                return
+            self.output = logging.StreamHandler(sys.stdout)
+            self.output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+            if LOG_ASYNC:
+                self.handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+                self._start_listener()
+            else:
+                self.handler = self.output
+            self.handler.addFilter(ContextFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+            root = logging.getLogger()
+            root.addHandler(self.handler)
+            root.setLevel(LOG_LEVEL)
+            atexit.register(self.stop)
+
+    def _start_listener(self):
+        self.listener = QueueListener(self.handler.queue, self.output)
+        self.listener.start()
+
+    def stop(self):
+        """Drain the queue and stop the listener thread"""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def reset_after_fork(self):
+        """
+        The listener thread does not survive fork and the inherited queue may
+        have been locked by it, so give the child a fresh queue and thread.
+        """
+        if self.listener is None:
+            return
+        self.handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.handler.dropped = 0
+        self._start_listener()
+
+    def stats(self):
+        if self.listener is None:
+            return {'async': False}
+        return {'async': True, 'queued': self.handler.queue.qsize(), 'dropped': self.handler.dropped}
+
+pipeline = LoggingPipeline()
+
+def configure_logging():
+    pipeline.configure()
+
+def _assign_request_id():
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+def _echo_request_id(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+def init_app(app):
+    configure_logging()
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
@@ -0,0 +1,254 @@
+"""
+Request and SQL metrics exposed at /metrics in the Prometheus text format.
+
+Each process keeps its own registry. When METRICS_DIR is set (gunicorn.conf.py
+does this for multi-worker servers) every worker also writes its registry to
+METRICS_DIR/metrics-<pid>.json about once a second, and /metrics merges the
+files of all workers, so any worker can answer a scrape.
+"""
+import json
+import os
+import threading
+import time
+from flask import Response, g, request, has_request_context
+from sqlalchemy import event
+from ..config import METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by method, route and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by method and route'),
+    'http_requests_in_flight': ('gauge', 'HTTP requests currently being served'),
+    'db_statements_total': ('counter', 'SQL statements executed, by route'),
+    'db_statement_duration_seconds_total': ('counter', 'Time spent executing SQL statements, by route'),
+}
+
+class MetricsRegistry:
+    """Counters, gauges and fixed-bucket histograms keyed by (name, labels)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.dirty = False
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self.dirty = True
+
+    def add_gauge(self, name, labels, delta):
+        key = (name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + delta
+            self.dirty = True
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts, then sum and count
+                histogram = self.histograms[key] = [0] * len(DURATION_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+            self.dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            self.dirty = False
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self.histograms.items()],
+            }
+
+registry = MetricsRegistry()
+_flush_state = {'pid': None, 'thread': None}
+_flush_lock = threading.Lock()
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f'metrics-{pid}.json')
+
+def _write_snapshot(snapshot, pid=None):
+    path = _snapshot_path(pid or os.getpid())
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        if registry.dirty:
+            try:
+                _write_snapshot(registry.snapshot())
+            except OSError:
+                pass
+
+def _ensure_flusher():
+    """Start the snapshot thread once per process (threads do not survive fork)"""
+    if not METRICS_DIR or _flush_state['pid'] == os.getpid():
+        return
+    with _flush_lock:
+        if _flush_state['pid'] != os.getpid():
+            thread = threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True)
+            thread.start()
+            _flush_state.update(pid=os.getpid(), thread=thread)
+
+def reset():
+    """Start from an empty registry, e.g. in a freshly forked worker"""
+    global registry
+    registry = MetricsRegistry()
+    _flush_state.update(pid=None, thread=None)
+
+def mark_process_dead(pid):
+    """
+    Called from gunicorn's child_exit hook: keep a dead worker's counters and
+    histograms (they must stay monotonic) but drop its gauges.
+    """
+    if not METRICS_DIR:
+        return
+    try:
+        with open(_snapshot_path(pid)) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    snapshot['gauges'] = []
+    _write_snapshot(snapshot, pid)
+
+def _merged_snapshot():
+    """This process's registry, merged with the other workers' snapshot files"""
+    if not METRICS_DIR:
+        return registry.snapshot()
+
+    _write_snapshot(registry.snapshot())
+    counters, gauges, histograms = {}, {}, {}
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith('metrics-') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot['gauges']:
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = values
+    return {
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'gauges': [[name, labels, value] for (name, labels), value in gauges.items()],
+        'histograms': [[name, labels, values] for (name, labels), values in histograms.items()],
+    }
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') + '"'
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def render():
+    """Prometheus text exposition (version 0.0.4) of all workers' metrics"""
+    snapshot = _merged_snapshot()
+    series = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for name, labels, value in snapshot[kind]:
+            series.setdefault(name, []).append((tuple(map(tuple, labels)), value))
+
+    lines = []
+    for name in sorted(series):
+        metric_type, help_text = HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(series[name]):
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+def _route_label():
+    if not has_request_context():
+        return 'background'
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _before_request():
+    _ensure_flusher()
+    g.metrics_start = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+    registry.add_gauge('http_requests_in_flight', (), 1)
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    # Count the request as done here; streamed bodies are still being sent
+    route = _route_label()
+    registry.add_gauge('http_requests_in_flight', (), -1)
+    registry.inc('http_requests_total', _labels(method=request.method, route=route, status=response.status_code))
+    registry.observe('http_request_duration_seconds', _labels(method=request.method, route=route),
+                     time.perf_counter() - start)
+    return response
+
+def _teardown_request(exc):
+    # Requests that raised never reach after_request
+    if g.pop('metrics_start', None) is not None:
+        registry.add_gauge('http_requests_in_flight', (), -1)
+        registry.inc('http_requests_total', _labels(method=request.method, route=_route_label(), status=500))
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    route = _route_label()
+    registry.inc('db_statements_total', _labels(route=route))
+    registry.inc('db_statement_duration_seconds_total', _labels(route=route), elapsed)
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+def metrics_view():
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+def init_app(app, engine):
+    """Register the request hooks, SQL listeners and the /metrics route"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
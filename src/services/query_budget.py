@@ -0,0 +1,120 @@
+"""
+Per-request SQL statement budgets and N+1 detection.
+
+Every statement a request executes is recorded. When the request ends it is
+checked against the budget declared with @query_budget(n) on the view, and
+statement shapes (the SQL with literals, parameters and IN lists collapsed)
+repeated QUERY_REPEAT_THRESHOLD or more times are reported as N+1 patterns.
+QUERY_BUDGET_MODE decides what happens: 'off', 'warn' (log) or 'raise'
+(raise QueryBudgetExceeded, used by benchmarks/check_query_budgets.py).
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from ..config import QUERY_BUDGET_MODE, QUERY_REPEAT_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)|\bIN\s*\(\s*__\[POSTCOMPILE_\w+\]\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+# Recorders opened with record_queries(), keyed by the thread that opened
+# them; background refreshes started by a request are not its statements
+_recorders = {}
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+def normalize_statement(statement):
+    """Reduce a statement to its shape so repeated lookups compare equal"""
+    shape = _STRING.sub('?', statement)
+    shape = _PARAM.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+class QueryRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def record(self, statement):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=None):
+        """(shape, times) for shapes executed at least `threshold` times"""
+        threshold = threshold or QUERY_REPEAT_THRESHOLD
+        if len(self.statements) < threshold:
+            return []
+        shapes = Counter(normalize_statement(statement) for statement in self.statements)
+        return [(shape, times) for shape, times in shapes.most_common() if times >= threshold]
+
+    def violations(self, budget=None, threshold=None):
+        """Human-readable budget and N+1 problems; empty when within limits"""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} statements, budget is {budget}')
+        for shape, times in self.repeated(threshold):
+            problems.append(f'N+1: {times} x {shape}')
+        return problems
+
+def query_budget(max_statements):
+    """Declare the most SQL statements a view may execute per request"""
+    def decorator(fn):
+        fn.query_budget = max_statements
+        return fn
+    return decorator
+
+@contextmanager
+def record_queries():
+    """Record statements outside a request, e.g. for service methods"""
+    recorder = QueryRecorder()
+    recorders = _recorders.setdefault(threading.get_ident(), [])
+    recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        recorders.remove(recorder)
+        if not recorders:
+            _recorders.pop(threading.get_ident(), None)
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for recorder in _recorders.get(threading.get_ident(), ()):
+        recorder.record(statement)
+    if has_request_context():
+        recorder = g.get('query_recorder')
+        if recorder is not None:
+            recorder.record(statement)
+
+def _before_request():
+    if current_app.config['QUERY_BUDGET_MODE'] != 'off':
+        g.query_recorder = QueryRecorder()
+
+def _after_request(response):
+    recorder = g.pop('query_recorder', None)
+    if recorder is None:
+        return response
+    view = current_app.view_functions.get(request.endpoint)
+    problems = recorder.violations(getattr(view, 'query_budget', None))
+    if problems:
+        message = f'{request.method} {request.path}: ' + '; '.join(problems)
+        if current_app.config['QUERY_BUDGET_MODE'] == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+def init_app(app, engine):
+    app.config.setdefault('QUERY_BUDGET_MODE', QUERY_BUDGET_MODE)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,194 @@
+"""
+In-memory index of the frontend build directory.
+
+The directory is scanned once (at gunicorn startup, or on first request) and
+every file up to STATIC_MEMORY_FILE_LIMIT bytes is held in memory with its
+mimetype, ETag and mtime, so serving the SPA costs no filesystem calls.
+Precompressed `.br`/`.gz` siblings are attached to the file they compress.
+With STATIC_WATCH=True a background thread rescans when the build changes.
+
+    python -m src.services.static_index compress   # write .gz (and .br) siblings
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+from functools import lru_cache
+from ..config import STATIC_MEMORY_FILE_LIMIT, STATIC_WATCH, STATIC_WATCH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Content-Encoding for each precompressed sibling suffix, in preference order
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+
+# Modern mimetypes for files the platform database may not know
+mimetypes.add_type('text/javascript', '.js')
+mimetypes.add_type('text/javascript', '.mjs')
+mimetypes.add_type('image/svg+xml', '.svg')
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+def guess_mimetype(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+@lru_cache(maxsize=None)
+def frontend_build_path():
+    """Resolve the React build directory on first use, falling back to src/static"""
+    build_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'earning-sakti-frontend', 'dist'))
+    if not os.path.exists(build_path):
+        logger.warning("Frontend build not found at %s", build_path)
+        build_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
+    return build_path
+
+class StaticFile:
+    __slots__ = ('path', 'body', 'size', 'mtime', 'etag', 'mimetype', 'variants')
+
+    def __init__(self, path, stat, mimetype):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.mimetype = mimetype
+        self.variants = {}
+        if self.size <= STATIC_MEMORY_FILE_LIMIT:
+            with open(path, 'rb') as f:
+                self.body = f.read()
+            self.etag = hashlib.blake2b(self.body, digest_size=10).hexdigest()
+        else:
+            # Served from disk by send_file
+            self.body = None
+            self.etag = f'{self.mtime:x}-{self.size:x}'
+
+class StaticIndex:
+    def __init__(self, resolve_root):
+        self._resolve_root = resolve_root
+        self._lock = threading.Lock()
+        self._files = None
+        self._signature = None
+        self._watch_pid = None
+
+    @property
+    def root(self):
+        return self._resolve_root()
+
+    def load(self):
+        """Scan the build directory now (idempotent once loaded)"""
+        if self._files is None:
+            with self._lock:
+                if self._files is None:
+                    self._files, self._signature = self._scan()
+        self._ensure_watcher()
+        return self._files
+
+    def get(self, path):
+        files = self._files if self._files is not None else self.load()
+        self._ensure_watcher()
+        return files.get(path)
+
+    def stats(self):
+        files = self._files or {}
+        return {
+            'loaded': self._files is not None,
+            'files': len(files),
+            'memory_bytes': sum(len(f.body) for f in files.values() if f.body is not None),
+            'precompressed': sum(len(f.variants) for f in files.values()),
+        }
+
+    def _walk(self):
+        root = self.root
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(directory, filename)
+                yield os.path.relpath(full_path, root).replace(os.sep, '/'), full_path
+
+    def _scan(self):
+        files, siblings = {}, []
+        signature = []
+        for rel_path, full_path in self._walk():
+            stat = os.stat(full_path)
+            signature.append((rel_path, stat.st_mtime_ns, stat.st_size))
+            sibling = next(((suffix, encoding) for suffix, encoding in ENCODINGS if rel_path.endswith(suffix)), None)
+            if sibling is not None:
+                siblings.append((rel_path, sibling, full_path, stat))
+                continue
+            files[rel_path] = StaticFile(full_path, stat, guess_mimetype(rel_path))
+
+        for rel_path, (suffix, encoding), full_path, stat in siblings:
+            original = files.get(rel_path[:-len(suffix)])
+            if original is not None:
+                original.variants[encoding] = StaticFile(full_path, stat, original.mimetype)
+            else:
+                # A compressed file with no uncompressed original is served as is
+                files[rel_path] = StaticFile(full_path, stat, guess_mimetype(rel_path))
+
+        logger.info("Indexed %d static files from %s", len(files), self.root)
+        return files, sorted(signature)
+
+    def _current_signature(self):
+        signature = []
+        for rel_path, full_path in self._walk():
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            signature.append((rel_path, stat.st_mtime_ns, stat.st_size))
+        return sorted(signature)
+
+    def _ensure_watcher(self):
+        if not STATIC_WATCH or self._watch_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watch_pid != os.getpid():
+                threading.Thread(target=self._watch, name='static-watch', daemon=True).start()
+                self._watch_pid = os.getpid()
+
+    def _watch(self):
+        while True:
+            time.sleep(STATIC_WATCH_INTERVAL)
+            try:
+                if self._current_signature() != self._signature:
+                    files, signature = self._scan()
+                    self._files, self._signature = files, signature
+            except OSError as e:
+                logger.warning("Static index rescan failed: %s", e)
+
+def precompress(root, min_size=1024):
+    """Write .gz siblings (and .br when the brotli package is installed) next to compressible files"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    compressible = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'application/manifest+json')
+    written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if filename.endswith(('.gz', '.br')) or not guess_mimetype(filename).startswith(compressible) or os.path.getsize(path) < min_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            written += 1
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+                written += 1
+    return written
+
+# Global index of the frontend build
+static_index = StaticIndex(frontend_build_path)
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from .log import configure_logging
+
+    parser = argparse.ArgumentParser(description='Frontend build directory tools')
+    parser.add_argument('command', choices=['compress'])
+    args = parser.parse_args()
+
+    configure_logging()
+    sys.stdout.write(f"Wrote {precompress(frontend_build_path())} precompressed files\n")